@@ -1,2 +1,2 @@
 from .alpha_detector import AlphaDetector
-from .gesture_detector import build_analyser
+from .gesture_detector import build_analyser, load_analyser
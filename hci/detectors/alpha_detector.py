@@ -4,6 +4,8 @@ import collections
 import numpy as np
 import scipy.signal as sig
 
+from hci.streaming.filters import butter_sos, IIRFilter
+from hci.streaming.welch import IncrementalWelch
 
 MIN_EPOCH_LENGTH = 2
 
@@ -24,6 +26,11 @@ class AlphaDetector:
         self.thr_emg = thr_emg
         self.psd_mode = psd_mode
         self.verbose = verbose
+        # Spectrum estimator reusing segments of overlapping epochs
+        self.welch = IncrementalWelch(fs, nperseg=256, noverlap=(256//2))
+        self._welch_channels = None
+        # Band filters without psd_mode: (end, IIRFilter, filtered window)
+        self._band_filters = {}
 
     def detect(self, x):
         """Detects signal stimulus.
@@ -37,46 +44,128 @@ class AlphaDetector:
         y : float
 
         """
-        x = x.astype(np.float64)
+        y, y_emg = self._detect_many(np.asarray(x)[None])
 
-        if x.shape[-1] < (MIN_EPOCH_LENGTH * self.fs):
-            raise ValueError('Failed to estimate stim, too short epoch length')
+        if self.verbose:
+            print('{:1.2f}/{:1.2f}'.format(y[0], y_emg[0]), file=sys.stderr)
 
-        # Detect signal stimulus in alpha band (Alpha activity).
-        y = self._detect(x, self.fs, 8, 12, psd_mode=self.psd_mode)
+        return y[0]
 
-        # Detect signal stimulus in beta band (EMG activity).
-        y_emg = self._detect(x, self.fs, 26, 30, psd_mode=self.psd_mode)
+    def detect_many(self, epoch, channels=None, end=None):
+        """Detects signal stimulus in several channels at once.
 
-        # Calculate output stimulus.
-        y = y if (not self._cmp(y_emg, self.thr_emg)) else 0.0
+        Spectrum of all channels is estimated once, both alpha and EMG band
+        powers are taken from it.
+
+        Parameters
+        ----------
+        epoch : 2d array (n_chans, n_ticks)
+
+        channels : list, optional
+            Channels to use, all by default.
+
+        end : int, optional
+            Absolute index of the sample after epoch, e.g. `Epoch.index`.
+            With it, spectra of segments shared with previous epochs are
+            reused, see `IncrementalWelch`. Without psd_mode, band filters
+            keep their state between epochs and filter only new samples, so
+            the filter starts before the epoch instead of at zero state.
+
+        Returns
+        -------
+        y : 1d array (n_channels, )
+
+        """
+        epoch = np.asarray(epoch)
+        if channels is not None:
+            epoch = epoch[channels]
+        channels_key = None if channels is None else tuple(channels)
+        if end is not None and channels_key != self._welch_channels:
+            self.welch.reset()
+            self._band_filters = {}
+            self._welch_channels = channels_key
+        y, y_emg = self._detect_many(epoch, end)
 
         if self.verbose:
-            print('{:1.2f}/{:1.2f}'.format(y, y_emg), file=sys.stderr)
+            # The same y/y_emg as in detect for each channel
+            print(' '.join('{:1.2f}/{:1.2f}'.format(*v)
+                           for v in zip(y, y_emg)), file=sys.stderr)
 
         return y
 
+    def _detect_many(self, x, end=None):
+        """Returns alpha stimulus, gated by EMG, and EMG stimulus for rows of
+        x, which ends at absolute index end, if known."""
+        x = x.astype(np.float64)
+
+        if x.shape[-1] < (MIN_EPOCH_LENGTH * self.fs):
+            raise ValueError('Failed to estimate stim, too short epoch length')
+
+        if self.psd_mode:
+            # Estimate power spectral density once for both bands.
+            if end is None:
+                f, pxx = sig.welch(x, self.fs, nperseg=256,
+                                   noverlap=(256//2), axis=-1)
+            else:
+                f, pxx = self.welch.psd(x.T, end)
+            # Detect signal stimulus in alpha band (Alpha activity).
+            y = self._band_power(f, pxx, 8, 12)
+            # Detect signal stimulus in beta band (EMG activity).
+            y_emg = self._band_power(f, pxx, 26, 30)
+        elif end is None:
+            y = self._detect(x, self.fs, 8, 12, psd_mode=False)
+            y_emg = self._detect(x, self.fs, 26, 30, psd_mode=False)
+        else:
+            y = self._detect_stream(x, end, 8, 12)
+            y_emg = self._detect_stream(x, end, 26, 30)
+
+        # Calculate output stimulus.
+        y = np.where(y_emg > self.thr_emg, 0.0, y)
+        return y, y_emg
+
+    @staticmethod
+    def _band_power(f, pxx, fmin, fmax):
+        """Mean power in (fmin, fmax) along the last axis."""
+        mask = (f > fmin) & (f < fmax)
+        return np.mean(pxx[..., mask], axis=-1)
+
+    def _detect_stream(self, x, end, fmin, fmax):
+        """Detects signal stimulus along the last axis of x, which ends at
+        absolute index end, filtering only samples after the previous x."""
+        n_ticks = x.shape[-1]
+        state = self._band_filters.get((fmin, fmax))
+        if state is not None:
+            last_end, iir, filtered = state
+        if state is None or not 0 <= end - last_end <= n_ticks or\
+                last_end - filtered.shape[-1] > end - n_ticks:
+            # Samples were skipped, filtering starts again at zero state
+            order, freq_nqst = 6, self.fs//2
+            iir = IIRFilter(butter_sos(order, fmin/freq_nqst, fmax/freq_nqst))
+            last_end, filtered = end - n_ticks, x[..., :0]
+        new = iir(x[..., n_ticks - (end - last_end):].T).T
+        filtered = np.concatenate((filtered, new), axis=-1)[..., -n_ticks:]
+        self._band_filters[(fmin, fmax)] = (end, iir, filtered)
+        return np.mean(filtered, axis=-1)
+
     @staticmethod
     def _detect(x, fs, fmin, fmax, psd_mode):
-        """Detects signal stimulus."""
+        """Detects signal stimulus along the last axis."""
         x = x.astype(np.float64)
 
         if psd_mode:
             # Estimate power spectral density.
-            f, pxx = sig.welch(x, fs, nperseg=256, noverlap=(256//2))
-            # Create mask.
-            mask = (f > fmin) & (f < fmax)
+            f, pxx = sig.welch(x, fs, nperseg=256, noverlap=(256//2),
+                               axis=-1)
             # Calculate stimulus.
-            y = np.mean(pxx[mask])
+            y = AlphaDetector._band_power(f, pxx, fmin, fmax)
         else:
-            # Design digital Butterworth filter in sos format.
+            # Design digital Butterworth filter in sos format, cached.
             order, freq_nqst = 6, fs//2
-            sos = sig.butter(order, [fmin/freq_nqst, fmax/freq_nqst],
-                             btype='bandpass', analog=False, output='sos')
+            sos = butter_sos(order, fmin/freq_nqst, fmax/freq_nqst)
             # Filter signal.
             xf = sig.sosfilt(sos, x, axis=-1)
             # Calculate stimulus.
-            y = np.mean(xf)
+            y = np.mean(xf, axis=-1)
 
         return y
 
@@ -0,0 +1,42 @@
+import numpy as np
+
+
+def ar_params(x, maxlag=6):
+    """Fits autoregressive model with constant to each series in a batch.
+
+    Parameters are estimated by conditional least squares, regressing x[t]
+    on 1, x[t - 1], ..., x[t - maxlag], as statsmodels `AR(c).fit(maxlag)`
+    and `AutoReg(c, maxlag)`, but all series are fitted at once.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Series (..., n_times), e.g. epochs (n_epochs, n_chans, n_times).
+
+    maxlag : int
+        Order of the model.
+
+    Returns
+    -------
+    params : np.ndarray
+        Constant and lag coefficients (..., maxlag + 1).
+
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if x.shape[-1] <= 2 * maxlag:
+        raise ValueError('Too short series for AR({})'.format(maxlag))
+    # Lagged values (..., n_times - maxlag, maxlag + 1), the latest first
+    windows = np.lib.stride_tricks.sliding_window_view(x, maxlag + 1,
+                                                       axis=-1)[..., ::-1]
+    y = windows[..., 0]
+    lags = windows[..., 1:]
+
+    # Regression with constant is regression of centered values
+    y_mean = y.mean(axis=-1)
+    lags_mean = lags.mean(axis=-2)
+    y = y - y_mean[..., None]
+    lags = lags - lags_mean[..., None, :]
+    lags_t = np.swapaxes(lags, -1, -2)
+    coefs = np.linalg.solve(lags_t @ lags, lags_t @ y[..., None])[..., 0]
+    const = y_mean - np.sum(coefs * lags_mean, axis=-1)
+    return np.concatenate((const[..., None], coefs), axis=-1)
@@ -0,0 +1,59 @@
+import functools
+
+import numpy as np
+import scipy.signal as sig
+
+# The whole spectrum as one band
+ALL_FREQUENCIES = ((0, np.inf),)
+
+
+@functools.lru_cache(maxsize=32)
+def band_masks(sfreq, nperseg, bands=ALL_FREQUENCIES):
+    """Returns masks (n_bands, n_freqs) of Welch frequencies in bands.
+
+    Parameters
+    ----------
+    sfreq : float
+
+    nperseg : int
+        Segment length of Welch method.
+
+    bands : tuple
+        Bands as pairs (fmin, fmax), frequency f is in band if
+        fmin <= f < fmax.
+    """
+    f = np.fft.rfftfreq(nperseg, 1 / sfreq)
+    masks = np.array([(f >= fmin) & (f < fmax) for fmin, fmax in bands],
+                     dtype=np.float64)
+    masks.setflags(write=False)
+    return masks
+
+
+def band_power(x, sfreq, bands=ALL_FREQUENCIES, nperseg=256):
+    """Returns total power in bands of each series of x.
+
+    Spectrum of all series is estimated by one Welch call.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Series (..., n_times), e.g. epochs (n_epochs, n_chans, n_times).
+
+    sfreq : float
+
+    bands : tuple
+        Bands as pairs (fmin, fmax), see `band_masks`.
+
+    nperseg : int
+        Segment length, at most n_times is used, as in `scipy.signal.welch`.
+
+    Returns
+    -------
+    power : np.ndarray
+        Sums of PSD in bands (..., n_bands).
+    """
+    x = np.asarray(x)
+    nperseg = min(nperseg, x.shape[-1])
+    _, pxx = sig.welch(x, fs=sfreq, nperseg=nperseg, axis=-1)
+    masks = band_masks(sfreq, nperseg, tuple(map(tuple, bands)))
+    return pxx @ masks.T
@@ -0,0 +1,35 @@
+"""Benchmark of AlphaDetector.detect_many against per-channel detect.
+
+Run with `python -m hci.detectors.bench_alpha_detector`.
+"""
+import timeit
+
+import numpy as np
+
+from hci.detectors.alpha_detector import AlphaDetector
+
+
+def main(fs=250, window=2, number=200):
+    detector = AlphaDetector(fs, thr_emg=10)
+    print('detect time, ms per epoch ({} s at {} Hz)'.format(window, fs))
+    print('{:>10} {:>10} {:>10} {:>8}'.format('channels', 'loop', 'batched',
+                                              'speedup'))
+    for n_chans in [3, 8, 16, 64]:
+        epoch = np.random.normal(size=(n_chans, fs * window))
+        channels = list(range(n_chans))
+
+        def loop():
+            return [detector.detect(epoch[ch, :]) for ch in channels]
+
+        def batched():
+            return detector.detect_many(epoch, channels)
+
+        assert np.allclose(loop(), batched())
+        times = [timeit.timeit(f, number=number) / number
+                 for f in [loop, batched]]
+        print('{:10d} {:10.3f} {:10.3f} {:8.1f}'.format(
+            n_chans, times[0] * 1000, times[1] * 1000, times[0] / times[1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""Benchmark of batched ar_params against statsmodels fits per channel.
+
+Run with `python -m hci.detectors.bench_autoregression`.
+"""
+import timeit
+
+import numpy as np
+from statsmodels.tsa.ar_model import AutoReg
+
+from hci.detectors.autoregression import ar_params
+
+
+def main(n_chans=8, n_times=250, maxlag=6):
+    print('AR({}) time, ms ({} channels, {} samples)'.format(
+        maxlag, n_chans, n_times))
+    print('{:>10} {:>12} {:>10} {:>8}'.format('epochs', 'statsmodels',
+                                              'batched', 'speedup'))
+    # Inference on one epoch and training on many
+    for n_epochs, number in [(1, 20), (100, 1), (1000, 1)]:
+        x = np.random.normal(size=(n_epochs, n_chans, n_times))
+
+        def loop():
+            return np.array([[AutoReg(c, lags=maxlag, trend='c').fit().params
+                              for c in epoch] for epoch in x])
+
+        def batched():
+            return ar_params(x, maxlag=maxlag)
+
+        assert np.allclose(loop(), batched())
+        times = [timeit.timeit(f, number=number) / number
+                 for f in [loop, batched]]
+        print('{:10d} {:12.3f} {:10.3f} {:8.1f}'.format(
+            n_epochs, times[0] * 1000, times[1] * 1000, times[0] / times[1]))
+
+
+if __name__ == '__main__':
+    main()
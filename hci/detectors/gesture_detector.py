@@ -1,14 +1,20 @@
+import os
+
 import numpy as np
 import scipy.signal as signal
 
 from joblib import Parallel, delayed
-
-from statsmodels.tsa.ar_model import AR
+from scipy.special import expit, softmax
 
 from sklearn.linear_model import LogisticRegressionCV
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, confusion_matrix
 
+from hci.detectors.autoregression import ar_params
+from hci.detectors.band_power import band_power, ALL_FREQUENCIES
+from hci.sources.recordings import cached_arrays, load_table
+from hci.streaming.filters import cached_design, FIRFilter
+
 sfreq = 250
 nyq = sfreq / 2
 epoch_len = 250
@@ -19,6 +25,12 @@ cut_end = 150
 
 channel_mask = np.array([True] * 6 + [False, False])
 
+ar_maxlag = 6
+
+# Version of saved analyser files
+ANALYSER_VERSION = 2
+
+@cached_design
 def build_filter():
     die_window = 3
     live_window = 4
@@ -40,47 +52,89 @@ def build_filter():
     gain_low = [0, 0, live_gain,
                live_gain, 0, 0]
 
-    b = signal.firwin2(sfreq, freq_low, gain_low, nyq=nyq, antisymmetric=False)
+    b = signal.firwin2(sfreq, freq_low, gain_low, fs=sfreq, antisymmetric=False)
     return b
 
+def epoch_starts(signal_timestamps, class_timestamps, epoch_len=epoch_len,
+                 epoch_step=epoch_step, cut_begin=cut_begin, cut_end=cut_end):
+    """Returns start indices of epochs and indices of their markers.
+
+    Samples strictly between consecutive markers form a segment, epochs
+    start every epoch_step samples after cut_begin samples of the segment
+    and end before the last cut_end samples. Timestamps should be sorted.
+    """
+    # Segment bounds, as mask (t > t0) & (t < t1)
+    begins = np.searchsorted(signal_timestamps, class_timestamps[:-1],
+                             'right')
+    ends = np.searchsorted(signal_timestamps, class_timestamps[1:], 'left')
+    lengths = np.maximum(ends - begins, 0)
+    n_epochs = -(-(lengths - cut_end - epoch_len - cut_begin) // epoch_step)
+    n_epochs = np.maximum(n_epochs, 0)
+
+    markers = np.repeat(np.arange(len(n_epochs)), n_epochs)
+    # Number of the epoch in its segment
+    numbers = np.arange(len(markers)) -\
+        np.repeat(np.cumsum(n_epochs) - n_epochs, n_epochs)
+    starts = begins[markers] + cut_begin + numbers * epoch_step
+    return starts, markers
+
+
 def get_epochs(signals_raw, signal_timestamps, class_raw, class_timestamps):
-    new_x, new_y = [], []
-    for i in range(len(class_raw)-1):
-        mask = (signal_timestamps > class_timestamps[i]) & (signal_timestamps < class_timestamps[i+1])
-        temp_x = signals_raw[mask]
-        # Cut beginning and an end
-        new_x_vals = []
-        new_y_vals = []
-        for j in range(cut_begin, len(temp_x)-cut_end-epoch_len, epoch_step):
-            new_x_vals.append(temp_x[j:epoch_len+j])
-            new_y_vals.append(int(class_raw[i]))
-
-        new_x.extend(new_x_vals)
-        new_y.extend(new_y_vals)
-
-    return np.array(new_x), np.array(new_y)
+    """Returns windows, start indices and labels of epochs.
+
+    Windows (n_samples - epoch_len + 1, epoch_len, n_chans) are a view of
+    signals_raw, epoch i is windows[starts[i]]. Overlapping epochs are
+    copied only by indexing, e.g. windows[starts].
+    """
+    starts, markers = epoch_starts(signal_timestamps, class_timestamps)
+    windows = np.moveaxis(np.lib.stride_tricks.sliding_window_view(
+        signals_raw, epoch_len, axis=0), -1, 1)
+    labels = np.asarray(class_raw).reshape(len(class_raw), -1)[:, 0]
+    return windows, starts, labels[markers].astype(int)
 
 def load_data(name):
+    """Returns windows, start indices and labels of epochs of recording, see
+    `get_epochs`.
+
+    Filtered signal and epoch starts with labels are cached, see
+    `hci.sources.recordings`. Windows are a view of memory-mapped filtered
+    signal.
+    """
+    bci_path, experiment_path = name + '_bci.csv', name + '_experiment.csv'
+    b = build_filter()
 
-    data = np.genfromtxt(name+'_bci.csv', delimiter=';')
-    data_y = np.genfromtxt(name+'_experiment.csv', delimiter=';')
+    def filter_signal():
+        data = load_table(bci_path)
+        signal_timestamps, signals_raw = data[:, 0], data[:, 1:]
 
-    signal_timestamps, signals_raw = data[:, 0], data[:, 1:]
-    class_timestamps, class_raw = data_y[:, 0], data_y[:, 1:]
+        #signals_raw = signals_raw[]
 
-    #signals_raw = signals_raw[]
+        signals_raw = signals_raw - signals_raw.mean(axis=1, keepdims=True)
+        signals_raw = signals_raw - np.mean(signals_raw, axis=0,
+                                            keepdims=True)
 
-    signals_raw = signals_raw - signals_raw.mean(axis=1, keepdims=True)
-    signals_raw = signals_raw - np.mean(signals_raw, axis=0, keepdims=True)
+        signals_filtered = FIRFilter(b)(signals_raw)
+        return signal_timestamps, signals_filtered
 
-    b = build_filter()
-    signals_filtered = signal.lfilter(b, 1, signals_raw, axis=0)
+    signal_timestamps, signals_filtered = cached_arrays(
+        [bci_path], 'filtered', filter_signal, (b,))
+
+    def epochs():
+        data_y = load_table(experiment_path)
+        class_timestamps, class_raw = data_y[:, 0], data_y[:, 1:]
+
+        _, starts, labels = get_epochs(signals_filtered, signal_timestamps,
+                                       class_raw, class_timestamps)
+        return starts, labels
 
-    xs, ys = get_epochs(signals_filtered, signal_timestamps, class_raw,
-                        class_timestamps)
-    return xs, ys
+    starts, labels = cached_arrays([bci_path, experiment_path], 'epochs',
+                                   epochs,
+                                   (epoch_len, epoch_step, cut_begin, cut_end))
+    windows = np.moveaxis(np.lib.stride_tricks.sliding_window_view(
+        signals_filtered, epoch_len, axis=0), -1, 1)
+    return windows, starts, labels
 
-def build_fe():
+def build_fe(bands=ALL_FREQUENCIES):
     def ft_augment(c):
         if not hasattr(c, 'fit_transform'):
             class augmented_class(c):
@@ -150,22 +204,13 @@ def build_fe():
                                                               keepdims=True) ** 0.5) ** 3).mean(
             axis=-1)
 
-    def ar_features(x, maxlag=6):
-        return np.hstack([AR(c).fit(maxlag=maxlag).params for c in x])
-
-    def ar(x):
-        x_ts = [ar_features(signal) for signal in x]
-        return np.array(x_ts)
+    def ar(x, maxlag=ar_maxlag):
+        # Parameters of all channels of an epoch, channel by channel
+        return ar_params(x, maxlag=maxlag).reshape(len(x), -1)
 
     def power(x):
-        spec = []
-        for epoch in x:
-            f, p = signal.welch(epoch, fs=sfreq)
-            spec.append(p)
-        spec = np.array(spec)
-        spec = spec[:, :, (f > 10) | (f < 40)]
-        p = np.sum(spec, axis=-1)
-        return p
+        # Powers of all bands of all channels of an epoch, channel by channel
+        return band_power(x, sfreq, bands).reshape(len(x), -1)
 
     transformers = [power, diff_abs, zc, h_activity, h_mobility, h_complexity,
                     slope_sign_change, skewness, ar]
@@ -205,32 +250,128 @@ def build_clf(x, y, fe):
     print('{}'.format(acc))
     print(confusion_matrix(y_val, y_pred))
 
-    def new_clf(x):
-        x_ts = scaler.transform(x)
-        y_pred = clf.predict_proba(x_ts)[:, 1]
-        return y_pred
-
-    return new_clf
-
-def build_analyser(name):
-    x, y = load_data(name)
-    fe = build_fe()
-    clf = build_clf(x.swapaxes(1, 2), y, fe)
-
-    b = build_filter()
-
-    def predict(x):
+    return scaler, clf
+
+def analyser_config():
+    """Returns settings of this module, which fitted analyser depends on."""
+    return {'sfreq': np.array(sfreq),
+            'epoch_len': np.array(epoch_len),
+            'channel_mask': channel_mask,
+            'ar_maxlag': np.array(ar_maxlag)}
+
+def analyser_params(b, bands, scaler, clf):
+    """Returns arrays of fitted analyser: settings, filter taps, power
+    bands, scaler and classifier."""
+    return {'version': np.array(ANALYSER_VERSION),
+            **analyser_config(),
+            'b': np.asarray(b),
+            'bands': np.array(bands, dtype=np.float64).reshape(-1, 2),
+            'mean': scaler.mean_,
+            'scale': scaler.scale_,
+            'coef': clf.coef_,
+            'intercept': clf.intercept_}
+
+def save_analyser(path, params):
+    """Saves analyser params to compressed .npz file."""
+    np.savez_compressed(path, **params)
+
+def load_analyser(path):
+    """Returns predictor of analyser saved by `build_analyser`.
+
+    Version of the file and settings, see `analyser_config`, are checked at
+    once, other arrays are read at the first prediction.
+    """
+    with np.load(path) as archive:
+        version = int(archive['version'])
+        if version != ANALYSER_VERSION:
+            raise ValueError('Analyser {} has version {}, expected {}'.format(
+                path, version, ANALYSER_VERSION))
+        for key, value in analyser_config().items():
+            if not np.array_equal(archive[key], value):
+                raise ValueError('Analyser {} has {} {}, expected {}'.format(
+                    path, key, archive[key], value))
+    return make_predictor(path)
+
+def make_predictor(params):
+    """Returns predictor of analyser params, see `analyser_params`, or of
+    the .npz file of them."""
+    b = fe = mean = scale = coef = intercept = None
+    fir = None
+    # Absolute index after the last filtered sample, the latest samples and
+    # the latest outputs of the filter
+    last_end = None
+    history = filtered = None
+
+    def load():
+        nonlocal params, b, fe, mean, scale, coef, intercept, fir
+        if isinstance(params, (str, os.PathLike)):
+            with np.load(params) as archive:
+                params = dict(archive)
+        b = params['b']
+        fe = build_fe(tuple(map(tuple, params['bands'])))
+        mean, scale = params['mean'], params['scale']
+        coef, intercept = params['coef'], params['intercept']
+        fir = FIRFilter(b)
+
+    def predict(x, end=None):
+        """Returns probability of gesture in the latest epoch of window x
+        (n_samples, n_chans).
+
+        With end, absolute index of the sample after x, e.g. position of the
+        windowed signal, only new samples are filtered. Predictor keeps
+        max(len(x), len(b) - 1 + epoch_len) latest samples, and result is
+        the same as without end for the window of these samples, so short
+        windows, e.g. of 1 s, are filtered once too.
+        """
+        nonlocal last_end, history, filtered
+        if fir is None:
+            load()
         x = x - x.mean(axis=1, keepdims=True)
-        x = x - np.mean(x, axis=0, keepdims=True)
 
-        x = signal.lfilter(b, 1, x, axis=0)
+        if end is not None:
+            if last_end is None or not 0 <= end - last_end <= len(x):
+                # Samples were skipped, filtering starts again
+                fir.reset()
+                last_end, history, filtered = end - len(x), x[:0], x[:0]
+            new = x[len(x) - (end - last_end):]
+            context_len = max(len(x), len(b) - 1 + epoch_len)
+            history = np.concatenate((history, new))[-context_len:]
+            filtered = np.concatenate((filtered, fir(new)))[-epoch_len:]
+            last_end = end
+            x = history
+
+        if end is None or len(x) < len(b) - 1 + epoch_len:
+            # Latest epoch depends on zeros before the window
+            x = x - np.mean(x, axis=0, keepdims=True)
+            x = FIRFilter(b)(x)
+        else:
+            # Filter is linear, so window mean is removed after filtering
+            x = filtered - np.mean(x, axis=0, keepdims=True) * np.sum(b)
         x = x[-epoch_len:]
         x = np.array([x])
         x = x.swapaxes(1, 2)
         x = fe.transform(x)
-        return clf(x)[0]
+
+        # Scaler and predict_proba of logistic regression
+        decision = ((x - mean) / scale) @ coef.T + intercept
+        if decision.shape[1] == 1:
+            return expit(decision[0, 0])
+        return softmax(decision[0])[1]
 
     return predict
 
+def build_analyser(name, path=None, bands=ALL_FREQUENCIES):
+    """Trains analyser on recording name and returns its predictor. With
+    path, the analyser is saved, see `load_analyser`."""
+    windows, starts, y = load_data(name)
+    x = windows[starts]
+    fe = build_fe(bands)
+    scaler, clf = build_clf(x.swapaxes(1, 2), y, fe)
+
+    params = analyser_params(build_filter(), bands, scaler, clf)
+    if path is not None:
+        save_analyser(path, params)
+    return make_predictor(params)
+
 if __name__ == '__main__':
-    build_analyser('artem_1')
\ No newline at end of file
+    build_analyser('artem_1')
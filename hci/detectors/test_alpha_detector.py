@@ -0,0 +1,63 @@
+import numpy as np
+import scipy.signal as sig
+
+from hci.streaming.filters import butter_sos
+
+from .alpha_detector import AlphaDetector
+
+
+def test_detect_many():
+    fs = 250
+    t = np.arange(2 * fs) / fs
+    epoch = 0.1 * np.random.normal(size=(4, len(t)))
+    epoch[1] += np.sin(2 * np.pi * 10 * t)
+    # EMG activity gates alpha stimulus
+    epoch[3] += np.sin(2 * np.pi * 10 * t) + 30 * np.sin(2 * np.pi * 28 * t)
+
+    for psd_mode in [True, False]:
+        detector = AlphaDetector(fs, thr_emg=1, psd_mode=psd_mode)
+        expected = [detector.detect(epoch[ch]) for ch in [3, 1, 0]]
+        assert np.allclose(detector.detect_many(epoch, [3, 1, 0]), expected)
+
+    detector = AlphaDetector(fs, thr_emg=1)
+    y = detector.detect_many(epoch)
+    assert y[1] > 10 * y[0] and y[3] == 0
+
+
+def test_detect_many_end():
+    fs = 250
+    data = np.random.normal(size=(3, 10 * fs))
+    detector = AlphaDetector(fs, thr_emg=1)
+    for end in range(2 * fs, data.shape[1], 128):
+        epoch = data[:, end - 2 * fs:end]
+        assert np.allclose(detector.detect_many(epoch, [2, 0], end),
+                           detector.detect_many(epoch, [2, 0]))
+
+
+def test_detect_many_filter_state():
+    # Without psd_mode, filter runs continuously from the first epoch
+    fs = 250
+    data = np.random.normal(size=(3, 10 * fs))
+    detector = AlphaDetector(fs, thr_emg=np.inf, psd_mode=False)
+    first = fs
+    sos = butter_sos(6, 8 / (fs // 2), 12 / (fs // 2))
+    for end in range(first + 2 * fs, data.shape[1], 100):
+        epoch = data[:, end - 2 * fs:end]
+        expected = sig.sosfilt(sos, data[:, first:end])[:, -2 * fs:]
+        assert np.allclose(detector.detect_many(epoch, end=end),
+                           expected.mean(axis=-1))
+        if end == first + 2 * fs:
+            # Filtering starts from zero state as without end
+            assert np.allclose(detector.detect_many(epoch),
+                               expected.mean(axis=-1))
+
+
+def test_detect_many_verbose(capsys):
+    fs = 250
+    epoch = np.random.normal(size=(2, 2 * fs))
+    detector = AlphaDetector(fs, thr_emg=1, verbose=True)
+    for ch in range(len(epoch)):
+        detector.detect(epoch[ch])
+    expected = capsys.readouterr().err.split()
+    detector.detect_many(epoch)
+    assert capsys.readouterr().err.split() == expected
@@ -0,0 +1,20 @@
+import numpy as np
+from statsmodels.tsa.ar_model import AutoReg
+
+from .autoregression import ar_params
+
+
+def test_ar_params():
+    x = np.random.normal(size=(3, 2, 250))
+    # AR(2) process with offset
+    for t in range(2, x.shape[-1]):
+        x[..., t] += 0.5 * x[..., t - 1] - 0.3 * x[..., t - 2] + 1
+
+    params = ar_params(x, maxlag=6)
+    assert params.shape == (3, 2, 7)
+    for i in range(3):
+        for j in range(2):
+            expected = AutoReg(x[i, j], lags=6, trend='c').fit().params
+            assert np.allclose(params[i, j], expected)
+    assert np.allclose(params[..., 1:3].mean(axis=(0, 1)), [0.5, -0.3],
+                       atol=0.15)
@@ -0,0 +1,21 @@
+import numpy as np
+import scipy.signal as sig
+
+from .band_power import band_power
+
+
+def test_band_power():
+    sfreq = 250
+    x = np.random.normal(size=(5, 3, 250))
+    # Sum over all frequencies of Welch PSD of each epoch
+    expected = np.array([sig.welch(epoch, fs=sfreq, nperseg=250)[1].sum(-1)
+                         for epoch in x])
+    assert np.allclose(band_power(x, sfreq)[..., 0], expected)
+
+    f, pxx = sig.welch(x, fs=sfreq, nperseg=250)
+    bands = [(8, 12), (26, 30), (0, 40)]
+    power = band_power(x, sfreq, bands)
+    assert power.shape == (5, 3, 3)
+    for i, (fmin, fmax) in enumerate(bands):
+        mask = (f >= fmin) & (f < fmax)
+        assert np.allclose(power[..., i], pxx[..., mask].sum(-1))
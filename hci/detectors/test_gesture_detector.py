@@ -0,0 +1,101 @@
+import glob
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+from hci.sources.recordings import cache_prefix
+
+from .gesture_detector import get_epochs, load_data, build_analyser,\
+    load_analyser, epoch_len, epoch_step, cut_begin, cut_end
+
+
+def test_get_epochs():
+    sfreq = 250
+    signal_timestamps = np.arange(60 * sfreq) / sfreq
+    signals = np.random.normal(size=(len(signal_timestamps), 3))
+    class_timestamps = np.array([-1.0, 2.0, 2.0, 10.0, 30.004, 70.0])
+    class_raw = np.array([[0], [1], [0], [1], [0], [1]])
+
+    windows, starts, y = get_epochs(signals, signal_timestamps, class_raw,
+                                    class_timestamps)
+    assert np.shares_memory(windows, signals)
+    x = windows[starts]
+    expected_x, expected_y = [], []
+    for i in range(len(class_timestamps) - 1):
+        mask = (signal_timestamps > class_timestamps[i]) &\
+            (signal_timestamps < class_timestamps[i + 1])
+        segment = signals[mask]
+        for j in range(cut_begin, len(segment) - cut_end - epoch_len,
+                       epoch_step):
+            expected_x.append(segment[j:j + epoch_len])
+            expected_y.append(class_raw[i, 0])
+    assert np.array_equal(x, expected_x)
+    assert np.array_equal(y, expected_y)
+
+
+def test_load_data():
+    with tempfile.TemporaryDirectory() as directory:
+        name = os.path.join(directory, 'session')
+        timestamps = np.arange(60 * 250) / 250
+        signals = np.random.normal(size=(len(timestamps), 8))
+        np.savetxt(name + '_bci.csv', np.hstack([timestamps[:, None],
+                                                 signals]), delimiter=';')
+        np.savetxt(name + '_experiment.csv', [[0, 1], [20, 0], [40, 1]],
+                   delimiter=';')
+
+        windows, starts, y = load_data(name)
+        x = windows[starts]
+        windows, starts, y_cached = load_data(name)
+        x_cached = windows[starts]
+        # Epochs are not cached, only their starts and labels
+        assert isinstance(starts, np.memmap)
+        epochs_cache = glob.glob(cache_prefix(
+            [name + '_bci.csv', name + '_experiment.csv'], 'epochs') + '*')
+        assert epochs_cache and all(np.load(path).ndim == 1
+                                    for path in epochs_cache)
+        assert x.shape[1:] == (epoch_len, 8) and len(x) == len(y)
+        assert np.array_equal(x, x_cached) and np.array_equal(y, y_cached)
+        assert set(y) == {0, 1}
+
+
+def test_saved_analyser():
+    with tempfile.TemporaryDirectory() as directory:
+        name = os.path.join(directory, 'session')
+        timestamps = np.arange(120 * 250) / 250
+        signals = np.random.normal(size=(len(timestamps), 8))
+        # Gesture is stronger activity in class 1
+        gesture = (timestamps // 20) % 2 == 1
+        signals[gesture] *= 3
+        np.savetxt(name + '_bci.csv', np.hstack([timestamps[:, None],
+                                                 signals]), delimiter=';')
+        np.savetxt(name + '_experiment.csv',
+                   [[t, (t // 20) % 2] for t in range(0, 121, 20)],
+                   delimiter=';')
+
+        path = os.path.join(directory, 'analyser.npz')
+        predict = build_analyser(name, path)
+        loaded = load_analyser(path)
+        for end in [1000, 6000, 6050, 11000]:
+            window = signals[end - 500:end]
+            expected = predict(window)
+            assert np.isclose(expected, loaded(window))
+            assert np.isclose(expected, loaded(window, end))
+        assert loaded(signals[5500:6000]) > 0.5 > loaded(signals[4000:4500])
+
+        # 1 s windows of the GUI, predictor keeps a longer window
+        first = 7000
+        with np.load(path) as archive:
+            context_len = len(archive['b']) - 1 + epoch_len
+        for end in range(first + 250, first + 1000, 30):
+            expected = predict(signals[max(end - context_len, first):end])
+            assert np.isclose(expected, loaded(signals[end - 250:end], end))
+
+        with np.load(path) as archive:
+            params = dict(archive)
+        for key, value in [('version', 0), ('epoch_len', 125),
+                           ('ar_maxlag', 4)]:
+            np.savez(path, **dict(params, **{key: np.array(value)}))
+            with pytest.raises(ValueError, match=key):
+                load_analyser(path)
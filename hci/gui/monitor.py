@@ -4,27 +4,39 @@ import tkinter as tk
 from hci.sources import Dummy, Source
 from hci.gui.widgets import MaskControllerAPI, SignalVisualizer,\
     Spectrogram, Analyser
-from hci.streaming.signal_interface import WindowedSignal, MaskController
+from hci.streaming.signal_interface import MaskController
+from hci.streaming.broker import SignalBroker
 
 
 class Monitor:
-    def __init__(self, windowed_signal: WindowedSignal):
+    """Monitor window with signal, spectrum and analysis widgets.
+
+    Parameters
+    ----------
+    signal_broker
+        Broker of the stream, each widget gets its own subscription.
+
+    window : float, optional
+        Window of widgets in seconds, max_window of broker by default.
+    """
+    def __init__(self, signal_broker: SignalBroker, window: float=None):
         self.root = tk.Tk()
 
         tk.Label(self.root, text="Monitor").pack()
 
-        n_chans = windowed_signal.n_chans
+        n_chans = signal_broker.n_chans
         self.mask_controller = MaskController(n_chans=n_chans,
                                               mask=[True]*n_chans)
 
-        self.signal_visualizer = SignalVisualizer(self.root,
-                                                  windowed_signal,
-                                                  self.mask_controller)
+        self.signal_visualizer = SignalVisualizer(
+            self.root, signal_broker.subscribe(window), self.mask_controller)
 
-        self.spectrogram = Spectrogram(self.root, windowed_signal,
+        self.spectrogram = Spectrogram(self.root,
+                                       signal_broker.subscribe(window),
                                        self.mask_controller)
 
-        self.analysis = Analyser(self.root, windowed_signal=windowed_signal,
+        self.analysis = Analyser(self.root,
+                                 windowed_signal=signal_broker.subscribe(window),
                                  mask_controller=self.mask_controller)
         self.spectrogram.pack(side=tk.LEFT, expand=tk.YES, fill=tk.BOTH)
         self.analysis.pack(side=tk.BOTTOM, expand=tk.YES, fill=tk.BOTH)
@@ -43,9 +55,9 @@ class Monitor:
 
 def start_monitor(source: Source, window):
     stream_inlet = source.get_stream_inlet(timeout=1)
-    signal_interface = WindowedSignal(stream_inlet, window)
+    signal_broker = SignalBroker(stream_inlet, window)
 
-    monitor = Monitor(signal_interface)
+    monitor = Monitor(signal_broker)
     monitor.start_mainloop()
 
 if __name__ == '__main__':
@@ -1,10 +1,11 @@
 import tkinter as tk
+from tkinter import filedialog
 from collections import deque
 from typing import Callable
 
 import numpy as np
 
-from hci.detectors import build_analyser
+from hci.detectors import build_analyser, load_analyser
 from hci.gui.utils import start_widget
 from hci.gui.widgets.basic_visualizer import BasicVisualizer
 from hci.sources import Dummy
@@ -22,19 +23,27 @@ class Analyser(BasicVisualizer):
     windowed_signal
         Provides data for the animation, should return list of new values.
 
+    load_analyser
+        Loads saved analyser by path, to use it instead of training.
+
     """
     def __init__(self, master: tk.Frame, *, build_analyser: Callable=None,
                  windowed_signal: WindowedSignal,
                  mask_controller: MaskController, name='Gesture', interval=50,
-                 navigation_toolbar=False):
+                 navigation_toolbar=False,
+                 load_analyser: Callable=load_analyser):
         self.signal_interface = windowed_signal
         self.n_chans = windowed_signal.n_chans
         self.mask_controller = mask_controller
         self.build_analyser = build_analyser
+        self.load_analyser = load_analyser
 
         self.button = tk.Button(master, text='Activate analysis',
                                 command=self.build_predictor)
         self.button.pack(side=tk.BOTTOM)
+        self.load_button = tk.Button(master, text='Load analyser',
+                                     command=self.load_predictor)
+        self.load_button.pack(side=tk.BOTTOM)
 
         super().__init__(master, name=name, interval=interval,
                          data_source=windowed_signal,
@@ -51,6 +60,14 @@ class Analyser(BasicVisualizer):
     def build_predictor(self, name='online'):
         self.predictor = self.build_analyser(name=name)
 
+    def load_predictor(self, path=None):
+        """Uses saved analyser, asking for its file by default."""
+        if path is None:
+            path = filedialog.askopenfilename(
+                title='Load analyser', filetypes=[('Analyser', '*.npz')])
+        if path:
+            self.predictor = self.load_analyser(path)
+
     def init_figure(self):
         """Function to clear figure and create empty plot."""
         # It is important, because with blit=True this function is called
@@ -70,7 +87,9 @@ class Analyser(BasicVisualizer):
                         len(data) == self.signal_interface.epoch_len and\
                         self.predictor is not None:
 
-            self.y.append(self.predictor(data))
+            # Position lets predictor filter only the new samples
+            self.y.append(self.predictor(data,
+                                         self.signal_interface.position))
 
             self.lines[0].set_data(self.x[:len(self.y)], self.y)
         return self.lines
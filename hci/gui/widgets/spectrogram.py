@@ -1,11 +1,10 @@
 import tkinter as tk
 
-from scipy.signal import welch
-
 from hci.gui.utils import start_widget
 from hci.gui.widgets import SignalVisualizer
 from hci.sources import Dummy
 from hci.streaming.signal_interface import WindowedSignal, MaskController
+from hci.streaming.welch import IncrementalWelch
 
 class Spectrogram(SignalVisualizer):
     """Widget for signal visualization.
@@ -26,6 +25,10 @@ class Spectrogram(SignalVisualizer):
                          name='Spec', interval=75,
                          navigation_toolbar=True)
 
+        # Periodograms of segments are reused between frames
+        self.welch = IncrementalWelch(signal_interface.sfreq, nperseg=256,
+                                      window='flattop', scaling='spectrum')
+
         self.default_xlim = (0, 250)
         self.default_ylim = (0, 10)
 
@@ -34,10 +37,8 @@ class Spectrogram(SignalVisualizer):
         if y is not None and len(y) == self.windowed_signal.epoch_len:
             mask = self.mask_controller.mask
 
-            nperseg = 256
-
-            self.x, self.y = welch(y.T, self.windowed_signal.sfreq, 'flattop',
-                                   nperseg, scaling='spectrum')
+            # Data ends at position of the signal after iteration
+            self.x, self.y = self.welch.psd(y, self.windowed_signal.position)
 
             beginning = (self.x < 5)
             fifty = (self.x > 45) & (self.x < 55)
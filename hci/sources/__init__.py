@@ -1,6 +1,7 @@
 from .source import Source, source2stream_info
 from .source import source2stream_inlet, source2stream_outlet
 
-from .openbci import OpenBCI
+from .openbci import OpenBCI, MultiOpenBCI
 from .dummy import Dummy
 from .experiment_recorder import ExperimentRecorder
+from .replay import Replay
@@ -1,32 +1,83 @@
 import time
 
 import numpy as np
+from pylsl import local_clock
 
-from hci.sources import Source, source2stream_outlet
+from hci.sources import Source
+from hci.sources.signal_models import SignalModel, WhiteNoise, Sines
 
 
 class Dummy(Source):
-    """Dummy data source for testing"""
+    """Dummy data source for testing and load generation.
+
+    Samples are generated and pushed in chunks. Chunks are scheduled against
+    monotonic clock from the start of streaming, so the stream keeps nominal
+    rate on average at any sfreq and n_chans; after a stall, all due samples
+    are pushed at once.
+
+    Parameters
+    ----------
+    std :
+        Standard deviation of white noise of the default model.
+
+    sin_freq :
+        Frequency of sine of the default model.
+
+    models :
+        List of `SignalModel`, summed to get signal. White noise and sine by
+        default.
+
+    chunk_duration :
+        Time between pushes in seconds.
+
+    seed :
+        Seed of random models.
+    """
     def __init__(self, *, std=0.1, sin_freq=10, name='Dummy', type='',
-                 n_chans=4, sfreq=500, source_id='Dummy'):
+                 n_chans=4, sfreq=500, source_id='Dummy',
+                 shared_memory=False, models: list=None,
+                 chunk_duration=0.02, seed=None):
         super().__init__(name=name, type=type, n_chans=n_chans, sfreq=sfreq,
-                         source_id=source_id)
+                         source_id=source_id, shared_memory=shared_memory)
         self.std = std
         self.sin_freq = sin_freq
+        if models is None:
+            models = [WhiteNoise(std), Sines([sin_freq])]
+        self.models = models
+        self.chunk_duration = chunk_duration
+        self.rng = np.random.RandomState(seed)
 
-    def start_streaming(self):
-        stream_outlet = source2stream_outlet(self)
+    def generate(self, start, n_samples):
+        """Returns samples start, ..., start + n_samples - 1 as float32 array
+        (n_samples, n_chans)."""
+        t = (start + np.arange(n_samples)) / self.sfreq
+        samples = np.zeros((n_samples, self.n_chans), dtype=np.float32)
+        for model in self.models:
+            samples += model.generate(t, self.n_chans, self.rng)
+        return samples
 
-        T = 1 / self.sfreq
+    def start_streaming(self, duration: float=None):
+        """Streams until duration seconds pass, forever by default."""
+        stream_outlet = self.get_stream_outlet()
         print('Starting streaming')
 
-        i = 0
-        while True:
-            i = (i + 1) % (self.sfreq * 60)
-            sample = self.std * np.random.normal(size=self.n_chans) +\
-                     np.sin(2 * np.pi * i * self.sin_freq / self.sfreq)
-            stream_outlet.push_sample(sample)
-            time.sleep(T)
+        start_time = time.monotonic()
+        start_timestamp = local_clock()
+        n_pushed = 0
+        while duration is None or n_pushed < duration * self.sfreq:
+            elapsed = time.monotonic() - start_time
+            n_due = int(elapsed * self.sfreq)
+            if duration is not None:
+                n_due = min(n_due, int(duration * self.sfreq))
+            if n_due > n_pushed:
+                chunk = self.generate(n_pushed, n_due - n_pushed)
+                # Timestamp of the last sample by the schedule
+                stream_outlet.push_chunk(
+                    chunk, start_timestamp + (n_due - 1) / self.sfreq)
+                n_pushed = n_due
+            next_push = start_time + (n_pushed + 1) / self.sfreq
+            time.sleep(max(next_push - time.monotonic(),
+                           self.chunk_duration))
 
 
 if __name__ == '__main__':
@@ -85,9 +85,10 @@ class ExperimentRecorderGUI:
 
 class ExperimentRecorder(Source):
     def __init__(self, *, paradigm, time_quant, name='Experiment', type='',
-                 n_chans=1, sfreq=IRREGULAR_RATE, source_id='Experiment'):
+                 n_chans=1, sfreq=IRREGULAR_RATE, source_id='Experiment',
+                 shared_memory=False):
         super().__init__(name=name, type=type, n_chans=n_chans, sfreq=sfreq,
-                         source_id=source_id)
+                         source_id=source_id, shared_memory=shared_memory)
         self.paradigm = paradigm
         self.time_quant = time_quant
 
@@ -1 +1,2 @@
 from .open_bci import OpenBCI
+from .multi_board import MultiOpenBCI
@@ -0,0 +1,47 @@
+"""Microbenchmark of per-byte and block packet decoding.
+
+Run with `python -m hci.sources.openbci.bench_open_bci_driver`.
+"""
+import timeit
+
+from hci.sources.openbci.emulator import make_board, make_counts
+from hci.sources.openbci.open_bci_driver import encode_packets
+
+
+def bench_per_byte(data, n_samples):
+    board = make_board(data)
+    for _ in range(n_samples):
+        board._read_serial_binary()
+
+
+def bench_block(data, chunk_size):
+    board = make_board(data)
+    n_read = 0
+    while n_read < len(data):
+        # Emulate serial backlog of chunk_size bytes per read
+        board.ser.inWaiting = lambda: chunk_size
+        board._read_serial_block()
+        n_read += chunk_size
+
+
+def main(n_samples=25000, repeat=3):
+    ids, eeg, aux = make_counts(n_samples)
+    data = encode_packets(ids, eeg, aux)
+
+    print('{} packets ({:.0f} s at 250 Hz)'.format(n_samples,
+                                                  n_samples / 250))
+    t = min(timeit.repeat(lambda: bench_per_byte(data, n_samples),
+                          number=1, repeat=repeat))
+    print('per-byte parser: {:8.1f} ms, {:10.0f} samples/s'.format(
+        t * 1000, n_samples / t))
+
+    for chunk_packets in [1, 10, 100]:
+        chunk_size = 33 * chunk_packets
+        t = min(timeit.repeat(lambda: bench_block(data, chunk_size),
+                              number=1, repeat=repeat))
+        print('block, {:3d} packets/read: {:8.1f} ms, {:10.0f} samples/s'
+              .format(chunk_packets, t * 1000, n_samples / t))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import numpy as np
+
+from pylsl import StreamOutlet, local_clock
+
+from hci.sources.openbci.open_bci_driver import SAMPLE_RATE
+from hci.sources.openbci.watchdog import id_steps
+from hci.streaming.clock import ClockRegression
+
+
+class ChunkedOutlet:
+    """Collects board samples and pushes them with one push_chunk call.
+
+    Timestamps are not taken at push time. Wrapping packet ids are unwrapped
+    into a packet counter, and timestamps are computed from it with
+    regression of arrival times on the counter. So they have nominal
+    spacing, keep gaps of dropped packets and do not pick up USB jitter.
+
+    Parameters
+    ----------
+    outlet :
+        Outlet to push samples.
+
+    chunk_size :
+        Push when this many samples are collected.
+
+    max_delay :
+        Push when the oldest collected sample waits this long, in seconds.
+
+    packet_rate :
+        Nominal rate of packet ids. With daisy module samples come at half of
+        this rate, with every second packet id.
+
+    halflife :
+        Number of arrival time measurements (one per pushed sample or block)
+        after which measurement weight is halved in clock regression.
+    """
+    def __init__(self, outlet: StreamOutlet, chunk_size=25, max_delay=0.1,
+                 packet_rate=SAMPLE_RATE, halflife=1000):
+        self.outlet = outlet
+        self.chunk_size = chunk_size
+        self.max_delay = max_delay
+        self.clock = ClockRegression(1 / packet_rate, halflife=halflife)
+
+        self.last_id = None
+        self.packet_counter = 0
+        self.channel_data = []
+        self.counters = []
+        self.n_collected = 0
+        self.first_arrival = None
+
+    def push_block(self, block):
+        """Collects OpenBCIBlock."""
+        if len(block) == 0:
+            return
+        arrival = local_clock()
+        counters = self._unwrap(block.ids)
+        self.clock.update(counters[-1], arrival)
+
+        if self.first_arrival is None:
+            self.first_arrival = arrival
+        self.channel_data.append(np.asarray(block.channel_data))
+        self.counters.append(counters)
+        self.n_collected += len(block)
+
+        if self.n_collected >= self.chunk_size or\
+                arrival - self.first_arrival >= self.max_delay:
+            self.flush()
+
+    def push_sample(self, sample):
+        """Collects OpenBCISample."""
+        arrival = local_clock()
+        counter = self._unwrap([sample.id])
+        self.clock.update(counter, arrival)
+
+        if self.first_arrival is None:
+            self.first_arrival = arrival
+        self.channel_data.append([sample.channel_data])
+        self.counters.append(counter)
+        self.n_collected += 1
+
+        if self.n_collected >= self.chunk_size or\
+                arrival - self.first_arrival >= self.max_delay:
+            self.flush()
+
+    def flush(self):
+        """Pushes collected samples."""
+        if self.n_collected == 0:
+            return
+        channel_data = np.concatenate(self.channel_data)
+        timestamps = self.clock.predict(np.concatenate(self.counters))
+        self.outlet.push_chunk(channel_data.tolist(), timestamps.tolist())
+
+        self.channel_data = []
+        self.counters = []
+        self.n_collected = 0
+        self.first_arrival = None
+
+    def _unwrap(self, ids):
+        """Converts 0-255 packet ids into monotonic packet counter."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if self.last_id is None:
+            self.last_id = ids[0] - 1
+        counters = self.packet_counter + np.cumsum(id_steps(self.last_id, ids))
+
+        self.last_id = ids[-1]
+        self.packet_counter = counters[-1]
+        return counters
@@ -0,0 +1,283 @@
+"""OpenBCI board emulator on a pseudo-terminal.
+
+Emulator answers commands, used by OpenBCIBoard and board calibration, and
+streams valid packets, so the driver can be tested and benchmarked without
+hardware. Use `emulator.port` as board port. `make_board` attaches board to
+in-memory serial data instead, for decoding tests and benchmarks.
+
+Run `python -m hci.sources.openbci.emulator` for throughput and latency
+benchmark of the driver.
+"""
+import collections
+import io
+import os
+import pty
+import select
+import threading
+import time
+import timeit
+import tty
+
+import numpy as np
+
+from hci.sources.openbci.open_bci_driver import OpenBCIBoard, SAMPLE_RATE,\
+    encode_packets, packet_length
+from hci.sources.openbci.watchdog import PacketStatistics
+
+GREETING = (b'OpenBCI V3 8-16 channel\n'
+            b'On Board ADS1299 Device ID: 0x3E\n'
+            b'LIS3DH Device ID: 0x33\n'
+            b'Firmware: emulator\n'
+            b'$$$')
+
+
+class BoardEmulator:
+    """OpenBCI board emulator.
+
+    Parameters
+    ----------
+    daisy :
+        Emulate daisy module: odd packets carry channels 1-8, even packets
+        carry channels 9-16.
+
+    sample_rate :
+        Packets per second, None to stream as fast as the reader consumes.
+
+    corruption_rate :
+        Probability of a corrupt byte in a packet.
+
+    drop_rate :
+        Probability of a packet to be lost. Packet ids keep counting.
+
+    seed :
+        Seed for signal and error generation.
+
+    Attributes
+    ----------
+    port : str
+        Path of the pseudo-terminal to connect to.
+
+    channel_settings : dict
+        Settings from `x...X` commands by channel command character.
+
+    send_times : deque
+        (number of packets generated, time.monotonic()) for recent writes.
+    """
+    def __init__(self, *, daisy=False, sample_rate=SAMPLE_RATE,
+                 corruption_rate=0.0, drop_rate=0.0, seed=None):
+        self.daisy = daisy
+        self.sample_rate = sample_rate
+        self.corruption_rate = corruption_rate
+        self.drop_rate = drop_rate
+        self.rng = np.random.RandomState(seed)
+
+        self.master_fd, self.slave_fd = pty.openpty()
+        tty.setraw(self.slave_fd)
+        os.set_blocking(self.master_fd, False)
+        self.port = os.ttyname(self.slave_fd)
+
+        self.streaming = False
+        self.channel_settings = {}
+        self.send_times = collections.deque(maxlen=10000)
+        self.n_packets = 0
+
+        self._output = bytearray()
+        self._commands = bytearray()
+        self._stream_start = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _run(self):
+        while self._running:
+            timeout = 0.05
+            if self.streaming and self.sample_rate is not None:
+                next_packet = self._stream_start +\
+                    (self.n_packets + 1) / self.sample_rate
+                timeout = min(timeout, max(next_packet - time.monotonic(), 0))
+
+            want_write = self._output or\
+                (self.streaming and self.sample_rate is None)
+            readable, writable, _ = select.select(
+                [self.master_fd], [self.master_fd] if want_write else [], [],
+                timeout)
+
+            if readable:
+                self._read_commands()
+            if self.streaming:
+                self._generate()
+            if writable or self._output:
+                self._write()
+
+    def _read_commands(self):
+        try:
+            self._commands += os.read(self.master_fd, 1024)
+        except (BlockingIOError, OSError):
+            return
+
+        while self._commands:
+            command = self._commands[:1]
+            if command == b'x':
+                # Channel settings: x, channel, 6 parameters, X
+                end = self._commands.find(b'X')
+                if end < 0:
+                    return
+                settings = bytes(self._commands[1:end])
+                self.channel_settings[settings[:1].decode()] =\
+                    settings[1:].decode()
+                del self._commands[:end + 1]
+                continue
+
+            del self._commands[:1]
+            if command == b'v':
+                self.streaming = False
+                self._output += GREETING
+            elif command == b'b':
+                self.streaming = True
+                self.n_packets = 0
+                self._stream_start = time.monotonic()
+            elif command == b's':
+                self.streaming = False
+            elif command == b'?':
+                self._output += b'Register settings are not emulated\n$$$'
+
+    def _generate(self):
+        if self.sample_rate is None:
+            # Keep a few packets ready, reader defines the rate
+            n = max(0, 100 - len(self._output) // packet_length())
+        else:
+            n_due = int((time.monotonic() - self._stream_start) *
+                        self.sample_rate)
+            n = n_due - self.n_packets
+        if n <= 0:
+            return
+
+        counters = self.n_packets + np.arange(n)
+        self.n_packets += n
+        self._output += self._make_packets(counters)
+        self.send_times.append((self.n_packets, time.monotonic()))
+
+    def _make_packets(self, counters):
+        n = len(counters)
+        ids = (counters + 1) % 256
+        t = counters / SAMPLE_RATE
+        # Each channel is sine with its own frequency plus noise, in counts
+        chans = 16 if self.daisy else 8
+        freqs = np.arange(1, chans + 1) * 2.0
+        counts = 10000 * np.sin(2 * np.pi * t[:, None] * freqs) +\
+            1000 * self.rng.normal(size=(n, chans))
+        if self.daisy:
+            # Odd ids carry main board channels, even ids daisy channels
+            counts = np.where((ids % 2 == 1)[:, None], counts[:, :8],
+                              counts[:, 8:])
+        aux = np.zeros((n, 3))
+
+        frames = np.frombuffer(encode_packets(ids, counts.astype(np.int64),
+                                              aux), dtype=np.uint8)
+        frames = frames.reshape(n, -1).copy()
+
+        keep = self.rng.uniform(size=n) >= self.drop_rate
+        corrupt = np.flatnonzero(self.rng.uniform(size=n) <
+                                 self.corruption_rate)
+        positions = self.rng.randint(frames.shape[1], size=len(corrupt))
+        noise = self.rng.randint(1, 256, size=len(corrupt)).astype(np.uint8)
+        frames[corrupt, positions] ^= noise
+        return frames[keep].tobytes()
+
+    def _write(self):
+        try:
+            n = os.write(self.master_fd, self._output)
+        except (BlockingIOError, OSError):
+            return
+        del self._output[:n]
+
+
+class FakeSerial(io.BytesIO):
+    """In-memory serial port with data to read."""
+    def inWaiting(self):
+        return len(self.getbuffer()) - self.tell()
+
+
+def make_board(data, daisy=False, scaled_output=True,
+               serial_class=FakeSerial):
+    """Board attached to in-memory serial data, skipping connection setup."""
+    board = OpenBCIBoard.__new__(OpenBCIBoard)
+    board.ser = serial_class(data)
+    board.streaming = True
+    board.scaling_output = scaled_output
+    board.eeg_channels_per_sample = 8
+    board.aux_channels_per_sample = 3
+    board.read_state = 0
+    board.daisy = daisy
+    board.log = False
+    board.log_packet_count = 0
+    board.packets_dropped = 0
+    board.block_buffer = bytearray()
+    board.last_odd_block = None
+    board.stats = PacketStatistics()
+    board.watchdog = None
+    board.acquisition_thread = None
+    board.acquisition_error = None
+    return board
+
+
+def make_counts(n_samples, seed=0):
+    """Random packet ids, EEG and auxiliary counts for `encode_packets`."""
+    rng = np.random.RandomState(seed)
+    ids = np.arange(n_samples) % 256
+    eeg = rng.randint(-2 ** 23, 2 ** 23, size=(n_samples, 8))
+    aux = rng.randint(-2 ** 15, 2 ** 15, size=(n_samples, 3))
+    return ids, eeg, aux
+
+
+def main(duration=5.0):
+    """Benchmarks driver reading from emulator."""
+    for sample_rate, mode in [(None, 'samples'), (None, 'blocks'),
+                              (SAMPLE_RATE, 'blocks')]:
+        with BoardEmulator(sample_rate=sample_rate) as emulator:
+            board = OpenBCIBoard(port=emulator.port, filter_data=False,
+                                 log=False)
+            latencies = []
+            n_samples = [0]
+
+            def count(x):
+                n_samples[0] += 1 if mode == 'samples' else len(x)
+                # Time since the latest write of the emulator
+                latencies.append(time.monotonic() -
+                                 emulator.send_times[-1][1])
+
+            start = timeit.default_timer()
+            if mode == 'samples':
+                board.start_streaming(count, lapse=duration)
+            else:
+                board.start_streaming_blocks(count, lapse=duration)
+            elapsed = timeit.default_timer() - start
+            board.disconnect()
+
+            rate = 'max' if sample_rate is None else '{:.0f}'.format(
+                sample_rate)
+            print('rate {:>4}, {:>7}: {:8.0f} samples/s, median latency '
+                  '{:.2f} ms'.format(rate, mode, n_samples[0] / elapsed,
+                                     np.median(latencies or [np.nan]) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""Several OpenBCI boards as one source.
+
+Each board is read by its own acquisition thread. `BoardMerger` unwraps
+packet ids of each board into a sample counter, fills lost packets, fits
+arrival time of the samples and joins samples with equal times into rows of
+one stream with channels of all boards.
+"""
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+from pylsl import local_clock
+
+from hci.sources import Source
+from hci.sources.openbci.open_bci_driver import OpenBCIBoard, SAMPLE_RATE
+from hci.sources.openbci.watchdog import id_steps
+from hci.streaming.clock import ClockRegression
+from hci.streaming.shared_ring import SharedMemoryOutlet
+
+BoardLag = namedtuple('BoardLag', [
+    'lag',  # seconds between board samples and samples of the first board
+    'backlog',  # seconds of samples waiting to be merged
+    'n_lost',  # lost packets, filled with the next sample
+    'n_dropped',  # samples dropped to keep board aligned
+    'n_duplicated',  # samples repeated to keep board aligned
+])
+
+
+class BoardQueue:
+    """Samples of one board waiting to be merged."""
+    def __init__(self, n_chans, sfreq, halflife):
+        self.clock = ClockRegression(1 / sfreq, halflife=halflife)
+        self.data = np.zeros((0, n_chans))
+        # Counter of the first sample in data
+        self.head = 0
+        self.last_id = None
+        self.lag = 0.0
+        self.n_lost = self.n_dropped = self.n_duplicated = 0
+
+    def add(self, ids, channel_data, arrival):
+        if len(ids) == 0:
+            return
+        if self.last_id is None:
+            self.last_id = (int(ids[0]) - 1) % 256
+        steps = id_steps(self.last_id, ids)
+        self.last_id = int(ids[-1])
+        self.n_lost += int(np.sum(steps - 1))
+        # Lost packet is replaced by the next received sample
+        self.data = np.concatenate((self.data,
+                                    np.repeat(channel_data, steps, axis=0)))
+        self.clock.update(self.head + len(self.data) - 1, arrival)
+
+    def head_time(self):
+        return float(self.clock.predict(self.head))
+
+    def drop(self, n):
+        n = min(n, len(self.data))
+        self.data = self.data[n:]
+        self.head += n
+        return n
+
+    def duplicate_head(self):
+        self.data = np.concatenate((self.data[:1], self.data))
+        self.head -= 1
+
+
+class BoardMerger:
+    """Joins samples of several boards by time.
+
+    At start, samples of boards, which started earlier, are dropped. Then
+    boards advance together, sample by sample. If time of a board drifts
+    from time of the first board by more than half of sampling period, its
+    sample is dropped or repeated.
+
+    Parameters
+    ----------
+    n_chans : list
+        Number of channels of each board.
+
+    sfreq : float
+
+    halflife : float
+        Number of arrival measurements after which their weight is halved in
+        clock regression.
+    """
+    def __init__(self, n_chans, sfreq=SAMPLE_RATE, halflife=1000):
+        self.sfreq = sfreq
+        self.queues = [BoardQueue(n, sfreq, halflife) for n in n_chans]
+        self.started = False
+
+    def add(self, board, ids, channel_data, arrival=None):
+        """Adds samples of board with their packet ids, received at arrival
+        time."""
+        if arrival is None:
+            arrival = local_clock()
+        self.queues[board].add(ids, channel_data, arrival)
+
+    def _start(self):
+        start = max(queue.head_time() for queue in self.queues)
+        for queue in self.queues:
+            n_early = int(round((start - queue.head_time()) * self.sfreq))
+            queue.n_dropped += queue.drop(max(n_early, 0))
+        self.started = all(len(queue.data) for queue in self.queues)
+
+    def _align(self):
+        reference = self.queues[0]
+        period = 1 / self.sfreq
+        for queue in self.queues[1:]:
+            while len(queue.data):
+                queue.lag = queue.head_time() - reference.head_time()
+                if queue.lag < -period / 2:
+                    queue.n_dropped += queue.drop(1)
+                elif queue.lag > period / 2:
+                    queue.duplicate_head()
+                    queue.n_duplicated += 1
+                else:
+                    break
+
+    def merge(self):
+        """Returns merged samples (n_samples, sum(n_chans)) and their
+        timestamps, which are times of the first board, or None."""
+        if any(len(queue.data) == 0 for queue in self.queues):
+            return None
+        if not self.started:
+            self._start()
+            if not self.started:
+                return None
+        self._align()
+
+        n = min(len(queue.data) for queue in self.queues)
+        if n == 0:
+            return None
+        reference = self.queues[0]
+        timestamps = reference.clock.predict(reference.head + np.arange(n))
+        data = np.hstack([queue.data[:n] for queue in self.queues])
+        for queue in self.queues:
+            queue.drop(n)
+        return data, timestamps
+
+    def lags(self):
+        """Returns BoardLag of each board."""
+        return [BoardLag(queue.lag, len(queue.data) / self.sfreq,
+                         queue.n_lost, queue.n_dropped, queue.n_duplicated)
+                for queue in self.queues]
+
+
+class MultiOpenBCI(Source):
+    """Several OpenBCI boards with 8 channels as one stream.
+
+    Channels of the first board go first.
+
+    Parameters
+    ----------
+    ports :
+        Serial ports of boards.
+
+    check_connection :
+        Run connection watchdog of each board.
+    """
+    def __init__(self, *, ports: list, check_connection=True,
+                 name='MultiOpenBCI', type='', source_id='MultiOpenBCI',
+                 shared_memory=False):
+        self.ports = ports
+        self.check_connection = check_connection
+        self.boards = []
+        self.readers = []
+        self.merger = BoardMerger([8] * len(ports))
+        super().__init__(name=name, type=type, n_chans=8 * len(ports),
+                         sfreq=SAMPLE_RATE, source_id=source_id,
+                         shared_memory=shared_memory)
+
+    def connect(self):
+        """Connects to boards in parallel, each one takes a few seconds."""
+        boards = [None] * len(self.ports)
+
+        def connect(i):
+            boards[i] = OpenBCIBoard(port=self.ports[i], filter_data=False,
+                                     scaled_output=True, log=False)
+
+        threads = [threading.Thread(target=connect, args=(i,))
+                   for i in range(len(self.ports))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if any(board is None for board in boards):
+            raise ConnectionError('Could not connect to all boards')
+        self.boards = boards
+
+    def get_lags(self):
+        """Returns BoardLag of each board, backlog includes samples not yet
+        read from acquisition threads."""
+        lags = self.merger.lags()
+        for i, reader in enumerate(self.readers):
+            lags[i] = lags[i]._replace(
+                backlog=lags[i].backlog + reader.n_pending / self.sfreq)
+        return lags
+
+    def start_streaming(self, duration: float=None):
+        """Streams merged samples until duration seconds pass, forever by
+        default."""
+        stream_outlet = self.get_stream_outlet()
+        if not self.boards:
+            self.connect()
+
+        self.readers = []
+        for board in self.boards:
+            ring_buffer = board.start_acquisition()
+            self.readers.append(ring_buffer.reader(position=0))
+            if self.check_connection:
+                board.check_connection()
+
+        start_time = time.monotonic()
+        try:
+            while duration is None or\
+                    time.monotonic() - start_time < duration:
+                self.readers[0].wait(timeout=0.1)
+                for board in self.boards:
+                    # Stalled board stops the stream
+                    board.check_acquisition()
+                for i, reader in enumerate(self.readers):
+                    records = reader.read()
+                    self.merger.add(i, records['id'], records['channel_data'])
+                merged = self.merger.merge()
+                if merged is not None:
+                    data, timestamps = merged
+                    stream_outlet.push_chunk(data.astype(np.float32),
+                                             timestamps.tolist())
+        finally:
+            # Acquisition threads must end before their ports are closed
+            for board in self.boards:
+                if board.streaming:
+                    board.stop()
+            for board in self.boards:
+                board.disconnect()
+            if isinstance(stream_outlet, SharedMemoryOutlet):
+                stream_outlet.close()
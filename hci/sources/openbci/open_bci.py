@@ -3,6 +3,8 @@ import time
 
 from hci.sources import source2stream_info, Source
 from hci.sources.openbci.open_bci_driver import OpenBCIBoard
+from hci.sources.openbci.chunked_outlet import ChunkedOutlet
+from hci.sources.openbci.recorder import BinaryRecorder
 
 from pylsl import StreamInfo, StreamOutlet
 
@@ -15,27 +17,62 @@ class OpenBCI(Source):
     port_id :
         Id for ttyUSB.
 
+    port :
+        Serial port path, overrides port_id. E.g. port of BoardEmulator.
+
     save_path :
         If streaming should record data in additional logfile.
+
+    binary_recording :
+        Record into binary logfile instead of text, see
+        recorder.load_recording and recorder.recording_to_csv.
+
+    threaded :
+        Read board in separate acquisition thread, so that pushing and
+        saving samples never stalls serial port reading.
+
+    chunk_size :
+        If set, samples are pushed in chunks of this size with timestamps
+        reconstructed from packet ids, see ChunkedOutlet.
+
+    shared_memory :
+        Also publish samples in shared memory for consumers on this host.
     """
-    def __init__(self, *, port_id=0, save_path: str=None, name='OpenBCI',
-                 type='', source_id='OpenBCI'):
+    def __init__(self, *, port_id=0, port: str=None, save_path: str=None,
+                 binary_recording=False, threaded=False, chunk_size: int=None, name='OpenBCI',
+                 type='', source_id='OpenBCI', shared_memory=False):
         self.port_id = port_id
+        self.port = port
         self.save_path = save_path
+        self.binary_recording = binary_recording
+        self.threaded = threaded
+        self.chunk_size = chunk_size
 
         n_chans = 8
         sfreq = 250
         super().__init__(name=name, type=type, n_chans=n_chans, sfreq=sfreq,
-                         source_id=source_id)
+                         source_id=source_id, shared_memory=shared_memory)
 
     def start_streaming(self):
         stream_outlet = self.get_stream_outlet()
-        start_bci_streaming(stream_outlet, self.port_id, self.save_path)
+        start_bci_streaming(stream_outlet, self.port_id, self.save_path,
+                            threaded=self.threaded, chunk_size=self.chunk_size,
+                            port=self.port,
+                            binary_recording=self.binary_recording)
 
 
-def make_callback(outlet: StreamOutlet, *, save_path: str=None):
+def make_callback(outlet: StreamOutlet, *, save_path: str=None,
+                  batched=False, chunk_size: int=None, max_delay=0.1,
+                  binary_recording=False):
     """Callback wrapper.
 
+    If binary_recording, samples are saved with BinaryRecorder, otherwise as
+    text lines of sample_to_str.
+
+    If batched, callbacks get OpenBCIBlock with several samples instead of
+    single OpenBCISample. If chunk_size is set, samples are pushed to outlet
+    with push_chunk once chunk_size samples are collected or the oldest one
+    waits max_delay seconds.
     """
     # =================
     # Save log to file.
@@ -45,6 +82,15 @@ def make_callback(outlet: StreamOutlet, *, save_path: str=None):
         with open(save_path, 'a') as file:
             file.write(sample_to_str(sample))
 
+    def callback_save_batch(block):
+        with open(save_path, 'a') as file:
+            file.writelines(sample_to_str(x) for x in block.samples())
+
+    if save_path and binary_recording:
+        recorder = BinaryRecorder(save_path)
+        callback_save = recorder.write_sample
+        callback_save_batch = recorder.write_block
+
     # ==================
     # Data transmission.
     # ==================
@@ -52,6 +98,20 @@ def make_callback(outlet: StreamOutlet, *, save_path: str=None):
     def push(x):
         outlet.push_sample(x.channel_data)
 
+    def push_batch(block):
+        outlet.push_chunk(block.channel_data.tolist())
+
+    if batched:
+        push, callback_save = push_batch, callback_save_batch
+
+    if chunk_size:
+        chunked_outlet = ChunkedOutlet(outlet, chunk_size=chunk_size,
+                                       max_delay=max_delay)
+        if batched:
+            push = chunked_outlet.push_block
+        else:
+            push = chunked_outlet.push_sample
+
     callback_functions = [push]
 
     if save_path:
@@ -76,7 +136,8 @@ def sample_to_str(sample):
 
 
 def start_bci_streaming(outlet: StreamOutlet, port_id: int=0, save_path: str=None,
-                    calibrate_board=None):
+                    calibrate_board=None, threaded=False, chunk_size=None,
+                    port: str=None, binary_recording=False):
     """Start streaming loop. Will use settings from settings file.
 
     Parameters
@@ -93,9 +154,23 @@ def start_bci_streaming(outlet: StreamOutlet, port_id: int=0, save_path: str=Non
     calibrate_board :
         Function for additional board calibration. Gets board as the only
         argument.
+
+    threaded :
+        Read board in separate acquisition thread and pass batches of samples
+        to callbacks.
+
+    chunk_size :
+        Push samples in chunks of this size with reconstructed timestamps.
+
+    port :
+        Serial port path, overrides port_id.
+
+    binary_recording :
+        Record into binary logfile instead of text.
     """
 
-    port = '/dev/ttyUSB' + str(port_id)  # dongle port
+    if port is None:
+        port = '/dev/ttyUSB' + str(port_id)  # dongle port
     baud = 115200  # serial port baud rate
 
     # =================
@@ -125,8 +200,13 @@ def start_bci_streaming(outlet: StreamOutlet, port_id: int=0, save_path: str=Non
     # ==========================
     # Start packet transmission.
     # ==========================
-    callback = make_callback(outlet, save_path=save_path)
-    board.start_streaming(callback)
+    callback = make_callback(outlet, save_path=save_path, batched=threaded,
+                             chunk_size=chunk_size,
+                             binary_recording=binary_recording)
+    if threaded:
+        board.start_streaming_threaded(callback)
+    else:
+        board.start_streaming(callback)
 
 
 if __name__ == '__main__':
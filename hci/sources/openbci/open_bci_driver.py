@@ -16,6 +16,7 @@ FIXME: at the moment we can just force daisy mode, do not check that the module
 
 
 """
+import bisect
 import serial
 import struct
 import numpy as np
@@ -27,6 +28,9 @@ import threading
 import sys
 import pdb
 
+from hci.streaming.ring_buffer import RingBuffer
+from hci.sources.openbci.watchdog import ConnectionWatchdog, PacketStatistics
+
 SAMPLE_RATE = 250.0  # Hz
 START_BYTE = 0xA0  # start of data packet
 END_BYTE = 0xC0  # end of data packet
@@ -101,6 +105,14 @@ class OpenBCIBoard(object):
         self.last_reconnect = 0
         self.reconnect_freq = 5
         self.packets_dropped = 0
+        self.block_buffer = bytearray()  # undecoded bytes for block reads
+        self.last_odd_block = None  # used for daisy in block mode
+        self.ring_buffer = None  # filled by acquisition thread
+        self.ring_reader = None  # used by start_streaming_threaded
+        self.acquisition_thread = None
+        self.acquisition_error = None  # raised to consumers of acquisition
+        self.stats = PacketStatistics()
+        self.watchdog = None
 
         # Disconnects from board when terminated
         atexit.register(self.disconnect)
@@ -171,6 +183,138 @@ class OpenBCIBoard(object):
             if self.log:
                 self.log_packet_count = self.log_packet_count + 1;
 
+    def start_streaming_blocks(self, callback, lapse=-1):
+        """
+        Start handling streaming data from the board in block mode. Everything
+        buffered on the serial port is decoded at once and the callback gets
+        an OpenBCIBlock with all samples read so far.
+
+        Args:
+          callback: A callback function -- or a list of functions -- that will receive a single argument of the
+              OpenBCIBlock object captured.
+        """
+        if not self.streaming:
+            self.ser.write(b'b')
+            self.streaming = True
+
+        start_time = timeit.default_timer()
+
+        if not isinstance(callback, list):
+            callback = [callback]
+
+        self.check_connection()
+
+        while self.streaming:
+            block = self._read_serial_block()
+            if self.daisy:
+                block = self._merge_daisy_block(block)
+
+            if len(block):
+                for call in callback:
+                    call(block)
+
+            if (lapse > 0 and timeit.default_timer() - start_time > lapse):
+                self.stop()
+            if self.log:
+                self.log_packet_count = self.log_packet_count + len(block)
+
+    def start_acquisition(self, capacity=int(SAMPLE_RATE * 60)):
+        """
+        Start background thread that only drains the serial port into a
+        preallocated ring buffer. Consumers read batches from the buffer with
+        their own RingReader, so slow consumers never block acquisition.
+
+        Args:
+          capacity: Number of samples kept in the ring buffer.
+
+        Returns:
+          RingBuffer with records of sample_dtype.
+        """
+        if not self.streaming:
+            self.ser.write(b'b')
+            self.streaming = True
+
+        dtype = sample_dtype(self.getNbEEGChannels(), self.getNbAUXChannels())
+        self.ring_buffer = RingBuffer(capacity, dtype=dtype)
+        self.acquisition_error = None
+        self.acquisition_thread = threading.Thread(target=self._acquire,
+                                                   daemon=True)
+        self.acquisition_thread.start()
+        return self.ring_buffer
+
+    def _acquire(self):
+        try:
+            while self.streaming:
+                block = self._read_serial_block()
+                if self.daisy:
+                    block = self._merge_daisy_block(block)
+                self.ring_buffer.write(block_to_records(block))
+        except (Exception, SystemExit) as error:
+            # Stalled or closed port, errors after stop are expected
+            if self.streaming:
+                if isinstance(error, SystemExit):
+                    error = ConnectionError('Source stalled')
+                self.acquisition_error = error
+                self.streaming = False
+
+    def check_acquisition(self):
+        """Raises error, which stopped the acquisition thread, if any."""
+        if self.acquisition_error is not None:
+            raise self.acquisition_error
+
+    def _join_acquisition(self, timeout=2.0):
+        """Waits for acquisition thread after streaming flag is cleared."""
+        thread = self.acquisition_thread
+        if thread is None or thread is threading.current_thread():
+            return
+        if thread.is_alive() and hasattr(self.ser, 'cancel_read'):
+            # Interrupts blocking read of port without timeout
+            self.ser.cancel_read()
+        thread.join(timeout)
+
+    def start_streaming_threaded(self, callback, lapse=-1,
+                                 capacity=int(SAMPLE_RATE * 60),
+                                 max_batch=None):
+        """
+        Start handling streaming data from the board with separate
+        acquisition thread. Callbacks run in the calling thread and get
+        OpenBCIBlock batches of all samples acquired since previous call.
+
+        Args:
+          callback: A callback function -- or a list of functions -- that will receive a single argument of the
+              OpenBCIBlock object captured.
+          capacity: Number of samples kept between acquisition and callbacks.
+          max_batch: Maximal number of samples passed to callbacks at once.
+        """
+        if not isinstance(callback, list):
+            callback = [callback]
+
+        start_time = timeit.default_timer()
+
+        ring_buffer = self.start_acquisition(capacity)
+        # Acquisition is already running, read from the very first sample
+        self.ring_reader = ring_buffer.reader(position=0)
+
+        self.check_connection()
+
+        while self.streaming:
+            if self.ring_reader.wait(timeout=0.1):
+                block = records_to_block(self.ring_reader.read(max_batch))
+                for call in callback:
+                    call(block)
+
+            if (lapse > 0 and timeit.default_timer() - start_time > lapse):
+                self.stop()
+
+        if self.acquisition_error is not None:
+            # Samples acquired before the error still reach callbacks
+            records = self.ring_reader.read()
+            if len(records):
+                block = records_to_block(records)
+                for call in callback:
+                    call(block)
+        self.check_acquisition()
+
     """
       PARSER:
       Parses incoming data packet into OpenBCISample.
@@ -205,10 +349,12 @@ class OpenBCIBoard(object):
                 if struct.unpack('B', b)[0] == START_BYTE:
                     if rep != 0:
                         self.warn('Skipped %d bytes before start found' % (rep))
+                        self.stats.update_resync(rep)
                         # Useless
                         rep = 0
                     packet_id = struct.unpack('B', read(1))[0]  # packet id goes from 0-255
-                    log_bytes_in = str(packet_id)
+                    if self.log:
+                        log_bytes_in = str(packet_id)
 
                     self.read_state = 1
 
@@ -221,10 +367,11 @@ class OpenBCIBoard(object):
                     literal_read = read(3)
 
                     unpacked = struct.unpack('3B', literal_read)
-                    log_bytes_in = log_bytes_in + '|' + str(literal_read);
+                    if self.log:
+                        log_bytes_in = log_bytes_in + '|' + str(literal_read)
 
                     # 3byte int in 2s compliment
-                    if (unpacked[0] >= 127):
+                    if (unpacked[0] >= 128):
                         pre_fix = b'\xFF'
                     else:
                         pre_fix = b'\x00'
@@ -248,7 +395,8 @@ class OpenBCIBoard(object):
 
                     # short = h
                     acc = struct.unpack('>h', read(2))[0]
-                    log_bytes_in = log_bytes_in + '|' + str(acc)
+                    if self.log:
+                        log_bytes_in = log_bytes_in + '|' + str(acc)
 
                     if self.scaling_output:
                         aux_data.append(acc * scale_fac_accel_G_per_count)
@@ -259,17 +407,71 @@ class OpenBCIBoard(object):
             # ---------End Byte---------
             elif self.read_state == 3:
                 val = struct.unpack('B', read(1))[0]
-                log_bytes_in = log_bytes_in + '|' + str(val)
+                if self.log:
+                    log_bytes_in = log_bytes_in + '|' + str(val)
                 self.read_state = 0  # read next packet
                 if val == END_BYTE:
                     sample = OpenBCISample(packet_id, channel_data, aux_data)
                     self.packets_dropped = 0
+                    self.stats.update_ids([packet_id])
                     return sample
                 else:
                     self.warn("ID:<%d> <Unexpected END_BYTE found <%s> instead of <%s>"
                               % (packet_id, val, END_BYTE))
-                    logging.debug(log_bytes_in)
+                    if self.log:
+                        logging.debug(log_bytes_in)
                     self.packets_dropped = self.packets_dropped + 1
+                    self.stats.update_resync(packet_length(
+                        self.eeg_channels_per_sample,
+                        self.aux_channels_per_sample))
+
+    def _read_serial_block(self):
+        """Reads everything buffered on the serial port and decodes all
+        complete packets in one pass. Incomplete trailing packet is kept for
+        the next call."""
+        # Wait for at least one packet, take the whole backlog if there is more
+        packet_size = packet_length(self.eeg_channels_per_sample,
+                                    self.aux_channels_per_sample)
+        data = self.ser.read(max(self.ser.inWaiting(), packet_size))
+        if not data:
+            self.warn('Source appears to be stalled. Quitting...')
+            sys.exit()
+
+        self.block_buffer += data
+        block, n_consumed, n_skipped = decode_packets(
+            self.block_buffer, self.eeg_channels_per_sample,
+            self.aux_channels_per_sample, self.scaling_output)
+        del self.block_buffer[:n_consumed]
+
+        if n_skipped:
+            self.warn('Skipped %d bytes to resync packets' % n_skipped)
+            self.packets_dropped += max(1, n_skipped // packet_size)
+            self.stats.update_resync(n_skipped)
+        elif len(block):
+            self.packets_dropped = 0
+        self.stats.update_ids(block.ids)
+
+        return block
+
+    def _merge_daisy_block(self, block):
+        """Concatenates main board and daisy samples, block version of the
+        pairing done in start_streaming."""
+        if self.last_odd_block is not None:
+            block = concatenate_blocks([self.last_odd_block, block])
+            self.last_odd_block = None
+
+        if len(block) and block.ids[-1] % 2 == 0:
+            # Last even sample waits for its odd pair from the next read
+            self.last_odd_block = block[-1:]
+
+        ids = block.ids.astype(np.int64)
+        pairs = np.flatnonzero((ids[1:] % 2 == 1) & (ids[1:] - 1 == ids[:-1]))
+        odd, even = pairs + 1, pairs
+
+        channel_data = np.hstack((block.channel_data[odd],
+                                  block.channel_data[even]))
+        aux_data = (block.aux_data[odd] + block.aux_data[even]) / 2
+        return OpenBCIBlock(block.ids[odd], channel_data, aux_data)
 
     """
 
@@ -280,6 +482,9 @@ class OpenBCIBoard(object):
     def stop(self):
         print("Stopping streaming...\nWait for buffer to flush...")
         self.streaming = False
+        if self.watchdog is not None:
+            self.watchdog.stop()
+        self._join_acquisition()
         self.ser.write(b's')
         if self.log:
             logging.warning('sent <s>: stopped streaming')
@@ -287,6 +492,8 @@ class OpenBCIBoard(object):
     def disconnect(self):
         if (self.streaming == True):
             self.stop()
+        # Acquisition could stop by itself, but still read the port
+        self._join_acquisition()
         if (self.ser.isOpen()):
             print("Closing Serial...")
             self.ser.close()
@@ -409,24 +616,31 @@ class OpenBCIBoard(object):
                 self.warn('Reconnecting')
                 self.reconnect()
 
-    def check_connection(self, interval=2, max_packets_to_skip=10):
-        # check number of dropped packages and establish connection problem if too large
-        if self.packets_dropped > max_packets_to_skip:
-            # if error, attempt to reconect
-            self.reconnect()
-        # check again again in 2 seconds
-        threading.Timer(interval, self.check_connection).start()
+    def check_connection(self, interval=2, max_loss_rate=0.1):
+        """Starts connection watchdog, if it is not running yet. It reconnects
+        the board when too many packets are lost."""
+        if self.watchdog is None or not self.watchdog.is_alive():
+            self.watchdog = ConnectionWatchdog(self, interval=interval,
+                                               max_loss_rate=max_loss_rate)
+            self.watchdog.start()
+
+    def get_stats(self):
+        """Returns StreamStats snapshot, rates are measured since the last
+        watchdog check."""
+        previous = self.watchdog.last_stats if self.watchdog else None
+        return self.stats.snapshot(previous)
 
     def reconnect(self):
         self.packets_dropped = 0
+        self.last_reconnect = timeit.default_timer()
         self.warn('Reconnecting')
-        self.stop()
+        # Streaming loops keep running, only the board is restarted
+        self.ser.write(b's')
         time.sleep(0.5)
-        self.ser.write('v')
+        self.ser.write(b'v')
         time.sleep(0.5)
-        self.ser.write('b')
+        self.ser.write(b'b')
         time.sleep(0.5)
-        self.streaming = True
         # self.attempt_reconnect = False
 
     # Adds a filter at 60hz to cancel out ambient electrical noise
@@ -538,3 +752,165 @@ class OpenBCISample(object):
         self.id = packet_id;
         self.channel_data = channel_data;
         self.aux_data = aux_data;
+
+
+class OpenBCIBlock(object):
+    """Object encapsulating consecutive samples from the OpenBCI board.
+
+    Args:
+      ids: Packet ids, array (n_samples,).
+      channel_data: EEG data, array (n_samples, n_eeg_chans).
+      aux_data: Auxiliary data, array (n_samples, n_aux_chans).
+    """
+
+    def __init__(self, ids, channel_data, aux_data):
+        self.ids = ids
+        self.channel_data = channel_data
+        self.aux_data = aux_data
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, item):
+        return OpenBCIBlock(self.ids[item], self.channel_data[item],
+                            self.aux_data[item])
+
+    def samples(self):
+        """Splits block into OpenBCISample objects."""
+        for i in range(len(self)):
+            yield OpenBCISample(int(self.ids[i]), list(self.channel_data[i]),
+                                list(self.aux_data[i]))
+
+
+def sample_dtype(eeg_channels=8, aux_channels=3):
+    """Record type to keep samples in a ring buffer."""
+    return np.dtype([('id', np.uint8),
+                     ('channel_data', np.float64, (eeg_channels,)),
+                     ('aux_data', np.float64, (aux_channels,))])
+
+
+def block_to_records(block):
+    records = np.empty(len(block), dtype=sample_dtype(
+        block.channel_data.shape[1], block.aux_data.shape[1]))
+    records['id'] = block.ids
+    records['channel_data'] = block.channel_data
+    records['aux_data'] = block.aux_data
+    return records
+
+
+def records_to_block(records):
+    return OpenBCIBlock(records['id'], records['channel_data'],
+                        records['aux_data'])
+
+
+def concatenate_blocks(blocks):
+    return OpenBCIBlock(np.concatenate([b.ids for b in blocks]),
+                        np.concatenate([b.channel_data for b in blocks]),
+                        np.concatenate([b.aux_data for b in blocks]))
+
+
+def packet_length(eeg_channels=8, aux_channels=3):
+    """Packet size in bytes: start byte, id, channels, aux and end byte."""
+    return 3 + 3 * eeg_channels + 2 * aux_channels
+
+
+def decode_packets(data, eeg_channels=8, aux_channels=3, scaled_output=True):
+    """
+    Decodes all complete packets from a byte buffer at once.
+
+    Packets are located by START_BYTE with END_BYTE exactly one packet length
+    later. Bytes that do not belong to such a frame are skipped, so decoding
+    resyncs on corrupt data by itself.
+
+    Args:
+      data: bytes-like object with raw serial data.
+      eeg_channels: Number of 3-byte EEG values in a packet.
+      aux_channels: Number of 2-byte auxiliary values in a packet.
+      scaled_output: Convert counts to uV and G.
+
+    Returns:
+      block: OpenBCIBlock with decoded samples.
+      n_consumed: Number of leading bytes of data that were processed. The
+          rest may hold the beginning of an incomplete packet.
+      n_skipped: Number of consumed bytes that did not belong to any packet.
+    """
+    size = packet_length(eeg_channels, aux_channels)
+    raw = np.frombuffer(data, dtype=np.uint8)
+    n = len(raw)
+
+    starts = np.flatnonzero(raw[:max(n - size + 1, 0)] == START_BYTE)
+    starts = starts[raw[starts + size - 1] == END_BYTE]
+
+    # Candidates can overlap only on corrupt data
+    if len(starts) > 1 and np.any(np.diff(starts) < size):
+        starts = _select_frames(starts, size)
+
+    last_end = starts[-1] + size if len(starts) else 0
+    # Bytes from here on could still start a packet that is not complete yet
+    n_consumed = max(last_end, n - size + 1, 0)
+    n_skipped = n_consumed - len(starts) * size
+
+    frames = raw[starts[:, None] + np.arange(size)]
+    ids = frames[:, 1]
+
+    # 24-bit big-endian two's complement
+    eeg = frames[:, 2:2 + 3 * eeg_channels].reshape(-1, eeg_channels, 3)
+    eeg = eeg.astype(np.int32)
+    eeg = (eeg[..., 0] << 16) | (eeg[..., 1] << 8) | eeg[..., 2]
+    eeg -= (eeg & 0x800000) << 1
+
+    aux = frames[:, 2 + 3 * eeg_channels:size - 1]
+    aux = np.ascontiguousarray(aux).view('>i2').astype(np.int32)
+
+    if scaled_output:
+        eeg = eeg * scale_fac_uVolts_per_count
+        aux = aux * scale_fac_accel_G_per_count
+
+    return OpenBCIBlock(ids, eeg, aux), n_consumed, n_skipped
+
+
+def _select_frames(starts, size):
+    """Picks non-overlapping frames, preferring the ones that continue a
+    chain of back-to-back packets over accidental START/END byte matches."""
+    chained = np.isin(starts + size, starts) | np.isin(starts - size, starts)
+
+    selected = []
+    for candidates in (starts[chained], starts[~chained]):
+        for start in candidates:
+            i = bisect.bisect(selected, start)
+            if (i > 0 and start - selected[i - 1] < size) or\
+                    (i < len(selected) and selected[i] - start < size):
+                continue
+            selected.insert(i, start)
+    return np.array(selected, dtype=np.intp)
+
+
+def encode_packets(ids, channel_counts, aux_counts):
+    """
+    Encodes raw counts into board packets, inverse of decode_packets with
+    scaled_output=False.
+
+    Args:
+      ids: Packet ids, array (n_samples,).
+      channel_counts: EEG counts, int array (n_samples, n_eeg_chans).
+      aux_counts: Auxiliary counts, int array (n_samples, n_aux_chans).
+
+    Returns:
+      bytes with concatenated packets.
+    """
+    channel_counts = np.asarray(channel_counts, dtype=np.int64)
+    aux_counts = np.asarray(aux_counts, dtype=np.int64)
+    n_samples, eeg_channels = channel_counts.shape
+    aux_channels = aux_counts.shape[1]
+    size = packet_length(eeg_channels, aux_channels)
+
+    frames = np.empty((n_samples, size), dtype=np.uint8)
+    frames[:, 0] = START_BYTE
+    frames[:, 1] = np.asarray(ids) % 256
+    eeg = channel_counts & 0xFFFFFF
+    eeg = np.stack((eeg >> 16, eeg >> 8, eeg), axis=-1) & 0xFF
+    frames[:, 2:2 + 3 * eeg_channels] = eeg.reshape(n_samples, -1)
+    aux = aux_counts.astype('>i2').view(np.uint8).reshape(n_samples, -1)
+    frames[:, 2 + 3 * eeg_channels:size - 1] = aux
+    frames[:, -1] = END_BYTE
+    return frames.tobytes()
@@ -0,0 +1,157 @@
+"""Binary recording of OpenBCI samples.
+
+File starts with a fixed size header, followed by fixed width records with
+packet id, EEG and auxiliary data. Records are little-endian, so recordings
+can be memory-mapped on any machine.
+"""
+import atexit
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b'OBCIREC\x00'
+VERSION = 1
+# Magic, version, number of EEG channels, number of auxiliary channels
+HEADER_FORMAT = '<8sIII'
+HEADER_SIZE = 32
+
+
+def record_dtype(eeg_channels=8, aux_channels=3):
+    return np.dtype([('id', '<u1'),
+                     ('channel_data', '<f8', (eeg_channels,)),
+                     ('aux_data', '<f8', (aux_channels,))])
+
+
+def read_header(file):
+    """Returns (eeg_channels, aux_channels) from recording header."""
+    header = file.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError('Recording header is incomplete')
+    magic, version, eeg_channels, aux_channels = struct.unpack_from(
+        HEADER_FORMAT, header)
+    if magic != MAGIC:
+        raise ValueError('Not an OpenBCI recording')
+    if version != VERSION:
+        raise ValueError('Unsupported recording version {}'.format(version))
+    return eeg_channels, aux_channels
+
+
+class BinaryRecorder:
+    """Writes samples into a binary recording.
+
+    File stays open, records go through a large write buffer and are synced
+    to disk every fsync_interval seconds. Appending to an existing recording
+    is allowed if it has the same channel layout, other files, e.g. text
+    logs, are refused.
+
+    Parameters
+    ----------
+    path :
+        Recording file.
+
+    buffer_size :
+        Size of write buffer in bytes.
+
+    fsync_interval :
+        Maximal time in seconds between syncs to disk.
+    """
+    def __init__(self, path, buffer_size=2**20, fsync_interval=5.0):
+        self.path = path
+        self.fsync_interval = fsync_interval
+
+        self.layout = None
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as file:
+                try:
+                    self.layout = read_header(file)
+                except ValueError as e:
+                    raise ValueError('{} is not a binary OpenBCI recording, '
+                                     'it can not be appended to'.format(path))\
+                        from e
+
+        self.file = open(path, 'ab', buffering=buffer_size)
+        self.last_sync = time.monotonic()
+        atexit.register(self.close)
+
+    def write_sample(self, sample):
+        """Writes OpenBCISample."""
+        self._write([sample.id], [sample.channel_data], [sample.aux_data])
+
+    def write_block(self, block):
+        """Writes OpenBCIBlock."""
+        self._write(block.ids, block.channel_data, block.aux_data)
+
+    def _write(self, ids, channel_data, aux_data):
+        channel_data = np.asarray(channel_data)
+        aux_data = np.asarray(aux_data)
+        layout = channel_data.shape[1], aux_data.shape[1]
+        if self.layout is None:
+            # Header is written with the first sample, when layout is known
+            self.file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, *layout)
+                            .ljust(HEADER_SIZE, b'\x00'))
+            self.layout = layout
+        elif layout != self.layout:
+            raise ValueError('Recording has {} EEG and {} AUX channels'
+                             .format(*self.layout))
+
+        records = np.empty(len(ids), dtype=record_dtype(*layout))
+        records['id'] = ids
+        records['channel_data'] = channel_data
+        records['aux_data'] = aux_data
+        self.file.write(records.tobytes())
+
+        if time.monotonic() - self.last_sync > self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        """Flushes buffer and syncs file to disk."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+        # Otherwise atexit keeps the recorder alive until exit
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def load_recording(path):
+    """Memory-maps binary recording.
+
+    Returns
+    -------
+    ids : array (n_samples, )
+    eeg : array (n_samples, n_eeg_chans)
+    aux : array (n_samples, n_aux_chans)
+    """
+    with open(path, 'rb') as file:
+        dtype = record_dtype(*read_header(file))
+    # Last record can be incomplete if recording was interrupted
+    n_samples = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+    if n_samples == 0:
+        records = np.empty(0, dtype=dtype)
+    else:
+        records = np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE,
+                            shape=(n_samples,))
+    return records['id'], records['channel_data'], records['aux_data']
+
+
+def recording_to_csv(path, csv_path, chunk_size=100000):
+    """Converts binary recording to the text layout of sample_to_str."""
+    ids, eeg, aux = load_recording(path)
+    fmt = ['%.0f'] + ['%.6f'] * eeg.shape[1] + ['%.3f'] * aux.shape[1]
+    with open(csv_path, 'w') as file:
+        for i in range(0, len(ids), chunk_size):
+            rows = np.hstack((ids[i:i + chunk_size, None],
+                              eeg[i:i + chunk_size], aux[i:i + chunk_size]))
+            np.savetxt(file, rows, fmt=fmt, delimiter=',')
@@ -0,0 +1,35 @@
+import numpy as np
+
+from .chunked_outlet import ChunkedOutlet
+from .open_bci_driver import OpenBCIBlock, SAMPLE_RATE
+
+
+class FakeOutlet:
+    def __init__(self):
+        self.chunks = []
+
+    def push_chunk(self, x, timestamp=0.0):
+        self.chunks.append((x, timestamp))
+
+
+def test_chunked_outlet():
+    outlet = FakeOutlet()
+    chunked_outlet = ChunkedOutlet(outlet, chunk_size=10, max_delay=100)
+
+    # Ids wrap around and packets 5 and 6 are lost
+    ids = np.delete(np.arange(250, 270), [5, 6]) % 256
+    channel_data = np.arange(len(ids) * 2).reshape(-1, 2)
+    for i in range(0, len(ids), 3):
+        chunked_outlet.push_block(OpenBCIBlock(ids[i:i+3],
+                                               channel_data[i:i+3],
+                                               np.zeros((3, 3))))
+    chunked_outlet.flush()
+
+    assert [len(x) for x, _ in outlet.chunks] == [12, 6]
+    pushed = np.concatenate([x for x, _ in outlet.chunks])
+    assert np.array_equal(pushed, channel_data)
+
+    # Timestamps have nominal spacing and keep the gap
+    timestamps = outlet.chunks[0][1]
+    steps = np.round(np.diff(timestamps) * SAMPLE_RATE)
+    assert np.array_equal(steps, [1, 1, 1, 1, 3, 1, 1, 1, 1, 1, 1])
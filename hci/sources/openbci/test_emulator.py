@@ -0,0 +1,45 @@
+import time
+
+import numpy as np
+import serial
+
+from .emulator import BoardEmulator
+from .open_bci_driver import decode_packets
+
+
+def read_for(ser, duration):
+    data = b''
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        data += ser.read(max(ser.inWaiting(), 1))
+    return data
+
+
+def test_emulator_protocol():
+    with BoardEmulator(sample_rate=None, seed=0) as emulator:
+        ser = serial.Serial(emulator.port, timeout=0.1)
+        ser.write(b'v')
+        assert read_for(ser, 0.2).endswith(b'$$$')
+
+        ser.write(b'x1060110X')
+        ser.write(b'b')
+        block, _, n_skipped = decode_packets(read_for(ser, 0.2))
+        assert len(block) > 100 and n_skipped == 0
+        assert np.all(np.diff(block.ids.astype(int)) % 256 == 1)
+        assert emulator.channel_settings == {'1': '060110'}
+
+        ser.write(b's')
+        read_for(ser, 0.1)
+        assert not emulator.streaming
+        ser.close()
+
+
+def test_emulator_errors():
+    with BoardEmulator(sample_rate=None, corruption_rate=0.1, drop_rate=0.1,
+                       seed=0) as emulator:
+        ser = serial.Serial(emulator.port, timeout=0.1)
+        ser.write(b'b')
+        block, _, n_skipped = decode_packets(read_for(ser, 0.2))
+        steps = np.diff(block.ids.astype(int)) % 256
+        assert n_skipped > 0 and np.any(steps > 1)
+        ser.close()
@@ -0,0 +1,74 @@
+import threading
+
+import numpy as np
+import pytest
+
+from .emulator import BoardEmulator
+from .multi_board import BoardMerger, MultiOpenBCI
+
+
+def feed(merger, board, counters, period=0.004, delay=0.0, block=10):
+    """Adds samples, which carry their counter, in blocks."""
+    for i in range(0, len(counters), block):
+        chunk = counters[i:i + block]
+        merger.add(board, chunk % 256, np.repeat(chunk[:, None], 2, axis=1),
+                   arrival=chunk[-1] * period + delay)
+
+
+def test_merger_alignment():
+    merger = BoardMerger([2, 2])
+    counters = np.arange(1000)
+    feed(merger, 0, counters)
+    # Second board started 20 samples later and lost a packet
+    late = counters[20:]
+    feed(merger, 1, np.delete(late, 100))
+
+    data, timestamps = merger.merge()
+    # Rows join samples of the same time, lost packet is filled with the
+    # next sample
+    assert np.sum(data[:, 0] != data[:, 2]) == 1
+    assert np.allclose(np.diff(timestamps), 0.004)
+    lags = merger.lags()
+    assert lags[1].n_lost == 1 and lags[0].n_dropped == 20
+    assert abs(lags[1].lag) <= 0.002
+
+
+def test_merger_drift():
+    merger = BoardMerger([2, 2])
+    counters = np.arange(5000)
+    n_merged = 0
+    for i in range(0, len(counters), 50):
+        chunk = counters[i:i + 50]
+        feed(merger, 0, chunk)
+        # Clock of the second board is 0.1% faster, its samples come early
+        feed(merger, 1, chunk, period=0.004 * 0.999)
+        merged = merger.merge()
+        if merged is not None:
+            n_merged += len(merged[0])
+            assert np.all(np.abs(merged[0][:, 0] - merged[0][:, 2]) <= 6)
+    assert merger.lags()[1].n_dropped > 0
+    assert n_merged > 4900
+
+
+@pytest.mark.filterwarnings(
+    'error::pytest.PytestUnhandledThreadExceptionWarning')
+def test_multi_board():
+    with BoardEmulator(seed=0) as first, BoardEmulator(seed=1) as second:
+        source = MultiOpenBCI(ports=[first.port, second.port],
+                              check_connection=False, source_id='TestMulti',
+                              shared_memory=True)
+        thread = threading.Thread(target=source.start_streaming,
+                                  kwargs={'duration': 1.0})
+        thread.start()
+        # Outlet is closed, when streaming ends
+        inlet = source.get_stream_inlet(timeout=5)
+        thread.join()
+        assert not any(board.acquisition_thread.is_alive()
+                       for board in source.boards)
+
+        inlet.reader.position = 0
+        samples, timestamps = inlet.pull_chunk(max_samples=1000)
+        inlet.close()
+        assert np.shape(samples)[1] == 16
+        assert len(samples) > 100
+        assert all(lag.backlog < 0.5 for lag in source.get_lags())
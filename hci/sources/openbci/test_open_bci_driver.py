@@ -0,0 +1,144 @@
+import threading
+
+import numpy as np
+import pytest
+
+from .emulator import FakeSerial, make_board, make_counts
+from .open_bci_driver import OpenBCIBoard, decode_packets, encode_packets,\
+    packet_length
+
+
+class BlockingSerial(FakeSerial):
+    """Port, which waits for more data at the end until read is cancelled."""
+    def __init__(self, data):
+        super().__init__(data)
+        self.cancelled = threading.Event()
+
+    def read(self, n=-1):
+        data = super().read(n)
+        if not data:
+            self.cancelled.wait()
+        return data
+
+    def cancel_read(self):
+        self.cancelled.set()
+
+
+def test_decode_packets():
+    ids, eeg, aux = make_counts(100)
+    data = encode_packets(ids, eeg, aux)
+
+    block, n_consumed, n_skipped = decode_packets(data, scaled_output=False)
+    assert n_consumed == len(data) and n_skipped == 0
+    assert np.array_equal(block.ids, ids)
+    assert np.array_equal(block.channel_data, eeg)
+    assert np.array_equal(block.aux_data, aux)
+
+
+def test_decode_packets_incomplete_tail():
+    ids, eeg, aux = make_counts(10)
+    data = encode_packets(ids, eeg, aux)
+    size = packet_length()
+
+    block, n_consumed, n_skipped = decode_packets(data[:-5],
+                                                  scaled_output=False)
+    assert len(block) == 9 and n_consumed == 9 * size and n_skipped == 0
+
+    block, _, _ = decode_packets(data[n_consumed:], scaled_output=False)
+    assert block.ids[0] == 9
+
+
+def test_decode_packets_resync():
+    ids, eeg, aux = make_counts(20)
+    data = bytearray(encode_packets(ids, eeg, aux))
+    size = packet_length()
+    # Garbage between packets and a broken end byte
+    data[5 * size:5 * size] = b'\xA0\x01\x02'
+    data[12 * size + 3 - 1] = 0x00
+
+    block, n_consumed, n_skipped = decode_packets(data, scaled_output=False)
+    expected = np.delete(ids, 11)
+    assert np.array_equal(block.ids, expected)
+    assert np.array_equal(block.channel_data, np.delete(eeg, 11, axis=0))
+    assert n_consumed == len(data)
+    assert n_skipped == 3 + size
+
+
+def test_block_statistics():
+    ids, eeg, aux = make_counts(300)
+    data = bytearray(encode_packets(np.delete(ids, [10, 11]),
+                                    np.delete(eeg, [10, 11], axis=0),
+                                    np.delete(aux, [10, 11], axis=0)))
+    data[100 * packet_length() - 1] = 0x00
+
+    board = make_board(data)
+    board._read_serial_block()
+    stats = board.get_stats()
+    assert stats.n_samples == 297
+    assert stats.n_lost == 3
+    assert stats.n_resyncs == 1 and stats.n_bytes_skipped == packet_length()
+
+
+def test_block_matches_per_byte_parser():
+    ids, eeg, aux = make_counts(50)
+    data = encode_packets(ids, eeg, aux)
+
+    board = make_board(data)
+    samples = [board._read_serial_binary() for _ in range(len(ids))]
+
+    board = make_board(data)
+    block = board._read_serial_block()
+
+    assert np.array_equal(block.ids, [s.id for s in samples])
+    assert np.allclose(block.channel_data, [s.channel_data for s in samples])
+    assert np.allclose(block.aux_data, [s.aux_data for s in samples])
+
+
+def test_daisy_block_across_reads():
+    ids, eeg, aux = make_counts(9)
+    data = encode_packets(ids, eeg, aux)
+    size = packet_length()
+
+    board = make_board(data[:5 * size], daisy=True, scaled_output=False)
+    first = board._merge_daisy_block(board._read_serial_block())
+    board.ser = FakeSerial(data[5 * size:])
+    second = board._merge_daisy_block(board._read_serial_block())
+
+    merged_ids = np.concatenate((first.ids, second.ids))
+    assert np.array_equal(merged_ids, [1, 3, 5, 7])
+    assert np.array_equal(second.channel_data[0],
+                          np.concatenate((eeg[5], eeg[4])))
+
+
+def test_streaming_threaded():
+    ids, eeg, aux = make_counts(300)
+    data = encode_packets(ids, eeg, aux)
+    board = make_board(data, serial_class=BlockingSerial)
+    board.check_connection = lambda: None
+
+    received = []
+
+    def callback(block):
+        received.append(block)
+        if sum(map(len, received)) == len(ids):
+            # Interrupts acquisition thread waiting for more data
+            board.stop()
+
+    board.start_streaming_threaded(callback)
+    assert not board.acquisition_thread.is_alive()
+    assert board.acquisition_error is None
+
+    assert np.array_equal(np.concatenate([b.ids for b in received]), ids)
+    assert board.ring_reader.n_lost == 0
+
+
+def test_streaming_threaded_stall():
+    ids, eeg, aux = make_counts(300)
+    board = make_board(encode_packets(ids, eeg, aux))
+    board.check_connection = lambda: None
+
+    received = []
+    # Port returns nothing after the data, as a stalled board
+    with pytest.raises(ConnectionError):
+        board.start_streaming_threaded(received.append)
+    assert np.array_equal(np.concatenate([b.ids for b in received]), ids)
@@ -0,0 +1,63 @@
+import gc
+import os
+import tempfile
+import weakref
+
+import numpy as np
+import pytest
+
+from .open_bci import sample_to_str, make_callback
+from .open_bci_driver import OpenBCIBlock
+from .recorder import BinaryRecorder, load_recording, recording_to_csv
+
+
+def make_block(n_samples, seed=0):
+    rng = np.random.RandomState(seed)
+    return OpenBCIBlock(np.arange(n_samples) % 256,
+                        rng.normal(size=(n_samples, 8)) * 100,
+                        rng.normal(size=(n_samples, 3)))
+
+
+def test_recorder():
+    block = make_block(300)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'recording.bin')
+        with BinaryRecorder(path) as recorder:
+            recorder.write_block(block[:100])
+            for sample in block[100:200].samples():
+                recorder.write_sample(sample)
+        # Appending to existing recording
+        with BinaryRecorder(path) as recorder:
+            recorder.write_block(block[200:])
+
+        ids, eeg, aux = load_recording(path)
+        assert np.array_equal(ids, block.ids)
+        assert np.array_equal(eeg, block.channel_data)
+        assert np.array_equal(aux, block.aux_data)
+
+        csv_path = os.path.join(directory, 'recording.csv')
+        recording_to_csv(path, csv_path, chunk_size=128)
+        with open(csv_path) as file:
+            lines = file.readlines()
+        assert lines == [sample_to_str(x) for x in block.samples()]
+        del ids, eeg, aux
+
+        # Closed recorder is released
+        recorder = weakref.ref(recorder)
+        gc.collect()
+        assert recorder() is None
+
+
+def test_text_recording_not_appended():
+    block = make_block(10)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'recording.txt')
+        # Text logs are written by default
+        save = make_callback(None, save_path=path, batched=True)[1]
+        save(block)
+        with open(path) as file:
+            assert file.readlines() == [sample_to_str(x)
+                                        for x in block.samples()]
+
+        with pytest.raises(ValueError, match='not a binary'):
+            make_callback(None, save_path=path, binary_recording=True)
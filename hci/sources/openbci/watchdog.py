@@ -0,0 +1,128 @@
+import threading
+import timeit
+from collections import namedtuple
+
+import numpy as np
+
+
+StreamStats = namedtuple('StreamStats', [
+    'elapsed',  # seconds since statistics were started
+    'n_samples',  # packets received
+    'n_lost',  # packets missing according to packet ids
+    'n_resyncs',  # corrupt packets and resynchronizations
+    'n_bytes_skipped',  # bytes that did not belong to valid packets
+    'sample_rate',  # received packets per second, over last interval
+    'loss_rate',  # part of packets lost, over last interval
+])
+
+
+def id_steps(last_id, ids):
+    """Differences between consecutive wrapping 0-255 packet ids, starting
+    from last_id. Same id again means that whole cycle was lost, so steps are
+    in range 1-256."""
+    ids = np.asarray(ids, dtype=np.int64)
+    steps = np.diff(np.concatenate(([last_id], ids))) % 256
+    steps[steps == 0] = 256
+    return steps
+
+
+class PacketStatistics:
+    """Counts received, lost and corrupt packets.
+
+    Counters are updated by the thread, reading the board, and read by others
+    with `snapshot`.
+    """
+    def __init__(self):
+        self.start_time = timeit.default_timer()
+        self.last_id = None
+        self.n_samples = 0
+        self.n_lost = 0
+        self.n_resyncs = 0
+        self.n_bytes_skipped = 0
+
+    def update_ids(self, ids):
+        """Registers received packet ids."""
+        if len(ids) == 0:
+            return
+        if self.last_id is not None:
+            self.n_lost += int(np.sum(id_steps(self.last_id, ids) - 1))
+        elif len(ids) > 1:
+            self.n_lost += int(np.sum(id_steps(ids[0], ids[1:]) - 1))
+        self.last_id = int(ids[-1])
+        self.n_samples += len(ids)
+
+    def update_resync(self, n_bytes_skipped):
+        """Registers corrupt data, which required resynchronization."""
+        self.n_resyncs += 1
+        self.n_bytes_skipped += n_bytes_skipped
+
+    def snapshot(self, previous: StreamStats=None):
+        """Returns StreamStats with rates computed since previous stats or
+        since start."""
+        elapsed = timeit.default_timer() - self.start_time
+        n_samples, n_lost = self.n_samples, self.n_lost
+        if previous is None:
+            previous = StreamStats(0.0, 0, 0, 0, 0, 0.0, 0.0)
+
+        duration = elapsed - previous.elapsed
+        d_samples = n_samples - previous.n_samples
+        d_lost = n_lost - previous.n_lost
+        sample_rate = d_samples / duration if duration > 0 else 0.0
+        loss_rate = d_lost / (d_samples + d_lost) if d_samples + d_lost else 0.0
+
+        return StreamStats(elapsed=elapsed, n_samples=n_samples,
+                           n_lost=n_lost, n_resyncs=self.n_resyncs,
+                           n_bytes_skipped=self.n_bytes_skipped,
+                           sample_rate=sample_rate, loss_rate=loss_rate)
+
+
+class ConnectionWatchdog(threading.Thread):
+    """Single long-lived thread checking board connection health.
+
+    Every interval seconds it takes board statistics and reconnects the board
+    if too many packets were lost or no packets came at all.
+
+    Parameters
+    ----------
+    board : OpenBCIBoard
+
+    interval :
+        Time between checks in seconds.
+
+    max_loss_rate :
+        Reconnect if larger part of packets was lost during interval.
+
+    min_sample_rate :
+        Reconnect if packets come slower, in packets per second.
+    """
+    def __init__(self, board, interval=2, max_loss_rate=0.1,
+                 min_sample_rate=1.0):
+        super().__init__(daemon=True)
+        self.board = board
+        self.interval = interval
+        self.max_loss_rate = max_loss_rate
+        self.min_sample_rate = min_sample_rate
+        self.last_stats = None
+        self._stopped = threading.Event()
+
+    def run(self):
+        self.last_stats = self.board.stats.snapshot()
+        while not self._stopped.wait(self.interval):
+            stats = self.board.stats.snapshot(self.last_stats)
+            self.last_stats = stats
+
+            recently_reconnected = timeit.default_timer() -\
+                self.board.last_reconnect < self.board.reconnect_freq
+            if recently_reconnected or not self.board.streaming:
+                continue
+
+            if stats.loss_rate > self.max_loss_rate:
+                self.board.warn('Lost {:.0%} of packets'.format(
+                    stats.loss_rate))
+                self.board.reconnect()
+            elif stats.sample_rate < self.min_sample_rate:
+                self.board.warn('Board sends no packets')
+                self.board.reconnect()
+
+    def stop(self):
+        self._stopped.set()
@@ -0,0 +1,83 @@
+"""Binary cache of recordings and arrays computed from them.
+
+Cached arrays are .npy files in `.cache` directory next to the recording,
+named by the recording, the stage of processing and a digest of
+modification time and size of source files and of parameters of the stage.
+Changed recording or parameters get a new cache file, older files of the
+stage are removed. Arrays are loaded memory-mapped, so repeated loads are
+almost free and only used parts are read from disk.
+"""
+import glob
+import hashlib
+import os
+
+import numpy as np
+
+CACHE_DIR = '.cache'
+
+
+def _digest(paths, params):
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(repr((os.path.abspath(path), stat.st_mtime_ns,
+                            stat.st_size)).encode())
+    for param in params:
+        if isinstance(param, np.ndarray):
+            digest.update(param.tobytes())
+        digest.update(repr(param).encode())
+    return digest.hexdigest()[:16]
+
+
+def cache_prefix(paths, stage):
+    """Returns path prefix of cache files of stage for source paths."""
+    directory, name = os.path.split(paths[0])
+    return os.path.join(directory, CACHE_DIR, '{}.{}'.format(name, stage))
+
+
+def cached_arrays(paths, stage, compute, params=()):
+    """Returns arrays computed from files, caching them.
+
+    Parameters
+    ----------
+    paths : list
+        Source files, the cache is valid while they are unchanged.
+
+    stage : str
+        Name of processing stage.
+
+    compute : callable
+        Returns tuple of arrays, called if there is no valid cache.
+
+    params : tuple
+        Parameters of the stage, arrays or values with stable repr.
+
+    Returns
+    -------
+    arrays : tuple
+        Read-only memory-mapped arrays.
+    """
+    prefix = cache_prefix(paths, stage)
+    key = '{}.{}'.format(prefix, _digest(paths, params))
+    # The first array is written last, so its file marks a complete cache
+    if not os.path.exists(key + '.0.npy'):
+        arrays = compute()
+        os.makedirs(os.path.dirname(prefix), exist_ok=True)
+        for stale in glob.glob(glob.escape(prefix) + '.*.npy'):
+            os.remove(stale)
+        for i in reversed(range(len(arrays))):
+            # Written under temporary name, so a partial file is never used
+            temporary = '{}.tmp{}'.format(key, os.getpid())
+            with open(temporary, 'wb') as f:
+                np.save(f, np.asarray(arrays[i]))
+            os.replace(temporary, '{}.{}.npy'.format(key, i))
+    n_arrays = len(glob.glob(glob.escape(key) + '.*.npy'))
+    return tuple(np.load('{}.{}.npy'.format(key, i), mmap_mode='r')
+                 for i in range(n_arrays))
+
+
+def load_table(path):
+    """Loads ';'-separated table (n_rows, n_cols) through the cache."""
+    return cached_arrays(
+        [path], 'table',
+        lambda: (np.loadtxt(path, delimiter=';', ndmin=2),))[0]
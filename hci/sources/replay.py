@@ -0,0 +1,122 @@
+import os
+import time
+
+import numpy as np
+from pylsl import IRREGULAR_RATE, local_clock
+
+from hci.sources import Source
+from hci.sources.recordings import load_table
+
+
+class Replay(Source):
+    """Source replaying a recorded session.
+
+    Recording is a pair of files, written by experiment recorder:
+    `<path>_bci.csv` with rows (timestamp, channels...) and optional
+    `<path>_experiment.csv` with rows (timestamp, marker). Signal and markers
+    are published with their original relative timestamps, shifted to the
+    start of replay.
+
+    Parameters
+    ----------
+    path :
+        Recording path without suffix, as for `gesture_detector.load_data`.
+
+    speed :
+        Replay speed, 1.0 for real time, None to push as fast as possible.
+
+    sfreq :
+        Nominal sampling rate, estimated from timestamps by default.
+
+    chunk_duration :
+        Time between pushes in seconds of recording.
+
+    Attributes
+    ----------
+    markers : Source or None
+        Source of marker stream, e.g. `replay.markers.get_stream_inlet()`.
+    """
+    def __init__(self, *, path, speed: float=1.0, sfreq: float=None,
+                 chunk_duration=0.02, name='Replay', type='',
+                 source_id='Replay', shared_memory=False):
+        self.path = path
+        self.speed = speed
+        self.chunk_duration = chunk_duration
+
+        signal = load_table(path + '_bci.csv')
+        self.timestamps = signal[:, 0]
+        self.data = signal[:, 1:]
+        if sfreq is None:
+            sfreq = float(np.round(1 / np.median(np.diff(self.timestamps))))
+        super().__init__(name=name, type=type, n_chans=self.data.shape[1],
+                         sfreq=sfreq, source_id=source_id,
+                         shared_memory=shared_memory)
+
+        self.markers = self.marker_timestamps = self.marker_data = None
+        marker_path = path + '_experiment.csv'
+        if os.path.exists(marker_path):
+            markers = load_table(marker_path)
+            self.marker_timestamps = markers[:, 0]
+            self.marker_data = markers[:, 1:]
+            self.markers = Source(name=name + 'Markers', type='Markers',
+                                  n_chans=self.marker_data.shape[1],
+                                  sfreq=IRREGULAR_RATE,
+                                  source_id=source_id + 'Markers',
+                                  shared_memory=shared_memory)
+
+    @property
+    def duration(self):
+        return self.timestamps[-1] - self.timestamps[0]
+
+    def start_streaming(self):
+        self.stream_outlet = self.get_stream_outlet()
+        self.marker_outlet = None
+        if self.markers is not None:
+            self.marker_outlet = self.markers.get_stream_outlet()
+        print('Starting replay of {}'.format(self.path))
+
+        t0 = self.timestamps[0]
+        start_time = time.monotonic()
+        # Shift of recorded timestamps to the local clock
+        shift = local_clock() - t0
+        chunk_size = max(int(self.chunk_duration * self.sfreq), 1)
+
+        n_pushed = n_markers_pushed = 0
+        while n_pushed < len(self.timestamps):
+            if self.speed is None:
+                n_due = min(n_pushed + chunk_size, len(self.timestamps))
+            else:
+                position = t0 + (time.monotonic() - start_time) * self.speed
+                n_due = int(np.searchsorted(self.timestamps, position,
+                                            'right'))
+            if n_due > n_pushed:
+                self.stream_outlet.push_chunk(
+                    np.asarray(self.data[n_pushed:n_due], dtype=np.float32),
+                    (self.timestamps[n_pushed:n_due] + shift).tolist())
+                n_pushed = n_due
+                if self.marker_outlet is not None:
+                    n_markers_pushed = self.push_markers(
+                        n_markers_pushed, self.timestamps[n_pushed - 1],
+                        shift)
+            if self.speed is not None:
+                time.sleep(self.chunk_duration / self.speed)
+
+        if self.marker_outlet is not None:
+            # Markers after the end of signal, e.g. the end of experiment
+            self.push_markers(n_markers_pushed, np.inf, shift)
+
+    def push_markers(self, n_pushed, until, shift):
+        """Pushes markers recorded before until, returns number of pushed
+        markers."""
+        n_due = int(np.searchsorted(self.marker_timestamps, until, 'right'))
+        for i in range(n_pushed, n_due):
+            self.marker_outlet.push_sample(self.marker_data[i],
+                                           self.marker_timestamps[i] + shift)
+        return max(n_due, n_pushed)
+
+
+if __name__ == '__main__':
+    import sys
+
+    source = Replay(path=sys.argv[1])
+    source.start_streaming()
@@ -0,0 +1,127 @@
+import threading
+import time
+import warnings
+
+from pylsl import ContinuousResolver, StreamInfo, StreamInlet,\
+    resolve_byprop, FOREVER
+
+
+class StreamResolver:
+    """Cache of visible streams by source_id, refreshed in background.
+
+    A continuous resolver keeps looking for streams, a daemon thread copies
+    its results into the cache every refresh_interval seconds. Known streams
+    are returned immediately, unknown ones are waited for in the cache and
+    finally resolved directly. Streams, which are gone, disappear from the
+    cache after forget_after seconds, a restarted source appears with its new
+    StreamInfo.
+
+    Parameters
+    ----------
+    refresh_interval : float
+        Time between cache updates in seconds.
+
+    forget_after : float
+        Time after which invisible streams are dropped in seconds.
+    """
+    def __init__(self, refresh_interval=0.2, forget_after=5.0):
+        self.refresh_interval = refresh_interval
+        self.resolver = ContinuousResolver(forget_after=forget_after)
+        self.streams = {}
+        self._updated = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            streams = {}
+            for stream_info in self.resolver.results():
+                streams.setdefault(stream_info.source_id(), []).append(
+                    stream_info)
+            with self._updated:
+                self.streams = streams
+                self._updated.notify_all()
+            time.sleep(self.refresh_interval)
+
+    def invalidate(self, source_id):
+        """Drops cached streams of source, e.g. after a failed connection."""
+        with self._updated:
+            self.streams.pop(source_id, None)
+
+    def resolve(self, source_id, timeout=FOREVER) -> list:
+        """Returns list of StreamInfo of source, empty if timeout expired."""
+        deadline = time.monotonic() + timeout
+        with self._updated:
+            while source_id not in self.streams:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._updated.wait(min(remaining, 1.0))
+            streams_info = self.streams.get(source_id, [])
+        if not streams_info:
+            # Continuous resolver may miss a stream, that just appeared
+            streams_info = resolve_byprop('source_id', source_id,
+                                          timeout=max(deadline -
+                                                      time.monotonic(), 0))
+        return streams_info
+
+    def resolve_one(self, source_id, timeout=FOREVER, cached=True)\
+            -> StreamInfo:
+        """Returns StreamInfo of the only stream of source.
+
+        After a restart, old stream of the source is visible for a while, so
+        several streams from one host are not an error any more: a warning
+        is issued and the latest created one is taken. Streams of the source
+        from several hosts raise ConnectionError. Without cached, the stream
+        is resolved directly.
+        """
+        if cached:
+            streams_info = self.resolve(source_id, timeout)
+        else:
+            streams_info = resolve_byprop('source_id', source_id,
+                                          timeout=timeout)
+        if len(streams_info) == 0:
+            raise ConnectionError(
+                'No source {} found for receiving'.format(source_id))
+        if len({info.hostname() for info in streams_info}) > 1:
+            raise ConnectionError(
+                'More than one source found for {}'.format(source_id))
+        if len(streams_info) > 1:
+            warnings.warn('Several streams of {}, taking the latest one'
+                          .format(source_id))
+        return max(streams_info, key=lambda info: info.created_at())
+
+    def open_inlet(self, source_id, timeout=FOREVER, open_timeout=1.0)\
+            -> StreamInlet:
+        """Returns opened inlet of the source.
+
+        Cached stream may belong to a stopped source, if it can not be
+        opened within open_timeout seconds, the source is resolved again
+        directly.
+        """
+        deadline = time.monotonic() + timeout
+        inlet = StreamInlet(self.resolve_one(source_id, timeout),
+                            recover=True)
+        try:
+            inlet.open_stream(timeout=open_timeout)
+            return inlet
+        except RuntimeError:
+            # Timeout or lost stream
+            self.invalidate(source_id)
+        stream_info = self.resolve_one(
+            source_id, max(deadline - time.monotonic(), open_timeout),
+            cached=False)
+        return StreamInlet(stream_info, recover=True)
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver() -> StreamResolver:
+    """Returns resolver shared by the process, starting it on first use."""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = StreamResolver()
+        return _resolver
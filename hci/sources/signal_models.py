@@ -0,0 +1,135 @@
+"""Synthetic signal models for Dummy source.
+
+Each model generates a chunk of samples (n_samples, n_chans) for given sample
+times, models are summed. Models with random events keep their state between
+chunks, so chunks of any size form one continuous signal.
+"""
+import numpy as np
+
+
+class SignalModel:
+    """Base class of signal models."""
+    def generate(self, t, n_chans, rng: np.random.RandomState):
+        """Returns samples (len(t), n_chans) for sample times t in seconds."""
+        raise NotImplementedError
+
+
+class WhiteNoise(SignalModel):
+    def __init__(self, std=0.1):
+        self.std = std
+
+    def generate(self, t, n_chans, rng):
+        return self.std * rng.standard_normal((len(t), n_chans))
+
+
+class Sines(SignalModel):
+    """Sum of sines, same in all channels.
+
+    Parameters
+    ----------
+    freqs : list
+        Frequencies in Hz.
+
+    amplitudes : list, optional
+        Amplitudes of sines, 1 by default.
+    """
+    def __init__(self, freqs, amplitudes=None):
+        self.freqs = np.asarray(freqs, dtype=np.float64)
+        if amplitudes is None:
+            amplitudes = np.ones(len(self.freqs))
+        self.amplitudes = np.asarray(amplitudes, dtype=np.float64)
+
+    def generate(self, t, n_chans, rng):
+        phases = 2 * np.pi * np.outer(t, self.freqs)
+        signal = np.sin(phases).dot(self.amplitudes)
+        return np.repeat(signal[:, None], n_chans, axis=1)
+
+
+class LineNoise(Sines):
+    """Power line interference with harmonics, decaying as 1/k."""
+    def __init__(self, freq=50, amplitude=0.2, n_harmonics=3):
+        harmonics = np.arange(1, n_harmonics + 1)
+        super().__init__(freq * harmonics, amplitude / harmonics)
+
+
+class Bursts(SignalModel):
+    """Random bursts of a carrier signal with smooth envelope.
+
+    Bursts start as Poisson process and last random time.
+
+    Parameters
+    ----------
+    rate : float
+        Mean number of bursts per second.
+
+    duration : tuple
+        Range of burst durations in seconds.
+
+    amplitude : float
+
+    channels : list, optional
+        Channels with bursts, all by default.
+    """
+    def __init__(self, rate, duration, amplitude, channels=None):
+        self.rate = rate
+        self.duration = duration
+        self.amplitude = amplitude
+        self.channels = channels
+        # (start, stop) of the current or the next burst
+        self.burst = None
+
+    def carrier(self, t, n_chans, rng):
+        raise NotImplementedError
+
+    def next_burst(self, after, rng):
+        start = after + rng.exponential(1 / self.rate)
+        return start, start + rng.uniform(*self.duration)
+
+    def envelope(self, t, rng):
+        envelope = np.zeros(len(t))
+        if len(t) == 0:
+            return envelope
+        if self.burst is None:
+            self.burst = self.next_burst(t[0], rng)
+        while self.burst[0] <= t[-1]:
+            start, stop = self.burst
+            inside = (t >= start) & (t < stop)
+            # Hann window over the burst
+            envelope[inside] = np.sin(np.pi * (t[inside] - start) /
+                                      (stop - start)) ** 2
+            if stop > t[-1]:
+                break
+            self.burst = self.next_burst(stop, rng)
+        return envelope
+
+    def generate(self, t, n_chans, rng):
+        envelope = self.envelope(t, rng)
+        samples = np.zeros((len(t), n_chans))
+        if not envelope.any():
+            return samples
+        channels = slice(None) if self.channels is None else self.channels
+        samples[:, channels] = self.amplitude * envelope[:, None] *\
+            self.carrier(t, n_chans, rng)[:, channels]
+        return samples
+
+
+class AlphaBursts(Bursts):
+    """Bursts of alpha rhythm, e.g. closed eyes."""
+    def __init__(self, freq=10, rate=0.2, duration=(1.0, 4.0), amplitude=1.0,
+                 channels=None):
+        super().__init__(rate, duration, amplitude, channels)
+        self.freq = freq
+
+    def carrier(self, t, n_chans, rng):
+        return np.repeat(np.sin(2 * np.pi * self.freq * t)[:, None], n_chans,
+                         axis=1)
+
+
+class EMGBursts(Bursts):
+    """Bursts of broadband muscle activity, e.g. gestures."""
+    def __init__(self, rate=0.5, duration=(0.2, 1.0), amplitude=2.0,
+                 channels=None):
+        super().__init__(rate, duration, amplitude, channels)
+
+    def carrier(self, t, n_chans, rng):
+        return rng.standard_normal((len(t), n_chans))
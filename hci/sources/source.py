@@ -1,32 +1,48 @@
-from pylsl import StreamInfo, StreamInlet, StreamOutlet, resolve_byprop
+from pylsl import StreamInfo, StreamInlet, StreamOutlet
 from pylsl import FOREVER
 from abc import abstractmethod, ABCMeta
 
 import warnings
 
+from hci.streaming.shared_ring import SharedMemoryInlet, SharedMemoryOutlet
+from hci.sources.resolver import get_resolver
+
 class Source:
-    """Abstract class for a data source."""
-    def __init__(self, *, name, type, n_chans, sfreq, source_id):
+    """Abstract class for a data source.
+
+    With shared_memory, outlet also writes samples into shared memory, and
+    inlet reads them from there, see `hci.streaming.shared_ring`. It works
+    only on the same host, remote consumers use LSL as before.
+    """
+    def __init__(self, *, name, type, n_chans, sfreq, source_id,
+                 shared_memory=False):
 
         self.name = name
         self.type = type
         self.n_chans = n_chans
         self.sfreq = sfreq
         self.source_id = source_id
+        self.shared_memory = shared_memory
 
     @abstractmethod
     def start_streaming(self):
         """Source starts streaming data"""
         pass
 
-    def get_stream_inlet(self, timeout=FOREVER) -> StreamInlet:
-        return source2stream_inlet(self, timeout=timeout)
+    def get_stream_inlet(self, timeout=FOREVER, shared_memory=None)\
+            -> StreamInlet:
+        if shared_memory is None:
+            shared_memory = self.shared_memory
+        return source2stream_inlet(self, timeout=timeout,
+                                   shared_memory=shared_memory)
 
     def get_stream_info(self) -> StreamInfo:
         return source2stream_info(self)
 
-    def get_stream_outlet(self) -> StreamOutlet:
-        return source2stream_outlet(self)
+    def get_stream_outlet(self, shared_memory=None) -> StreamOutlet:
+        if shared_memory is None:
+            shared_memory = self.shared_memory
+        return source2stream_outlet(self, shared_memory=shared_memory)
 
 
 def source2stream_info(source: Source) -> StreamInfo:
@@ -35,23 +51,27 @@ def source2stream_info(source: Source) -> StreamInfo:
                       source_id=source.source_id)
 
 
-def source2stream_inlet(source: Source, timeout=FOREVER) -> StreamInfo:
-    streams_info =  resolve_byprop('source_id', source.source_id,
-                                   timeout=timeout)
-    if len(streams_info) == 1:
-        stream_info = streams_info[0]
-        return StreamInlet(stream_info)
+def source2stream_inlet(source: Source, timeout=FOREVER,
+                        shared_memory=False) -> StreamInfo:
+    """Creates inlet of the source.
 
-    elif len(streams_info) > 1:
-        raise ConnectionError(
-            'More than one source found for {}'.format(source.source_id))
+    Stream is looked up in the cache of process-wide `StreamResolver`, so
+    inlets of running sources are created without discovery delay. Stale
+    cached streams are detected when the inlet is opened. Of several
+    streams of the source from one host the latest one is used with a
+    warning, see `StreamResolver.resolve_one`. LSL inlet recovers by
+    itself, when the source restarts with the same source_id.
+    """
+    if shared_memory:
+        return SharedMemoryInlet(source.source_id, timeout=timeout)
 
-    else:
-        raise ConnectionError(
-            'No source {} found for receiving'.format(source.source_id))
+    return get_resolver().open_inlet(source.source_id, timeout)
 
 
-def source2stream_outlet(source: Source) -> StreamOutlet:
+def source2stream_outlet(source: Source, shared_memory=False)\
+        -> StreamOutlet:
     stream_info = source2stream_info(source)
     stream_outlet = StreamOutlet(stream_info)
+    if shared_memory:
+        return SharedMemoryOutlet(stream_info, lsl_outlet=stream_outlet)
     return stream_outlet
\ No newline at end of file
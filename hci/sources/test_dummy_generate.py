@@ -0,0 +1,42 @@
+import threading
+import time
+
+import numpy as np
+
+from hci.sources.dummy import Dummy
+from hci.sources.signal_models import Sines, LineNoise, AlphaBursts,\
+    EMGBursts
+
+
+def test_dummy_chunks_continuous():
+    def make_models():
+        return [Sines([3.0, 40.0]), LineNoise(), AlphaBursts(rate=5)]
+
+    whole = Dummy(models=make_models(), seed=0).generate(0, 1000)
+    device = Dummy(models=make_models(), seed=0)
+    chunks = [device.generate(start, 150) for start in range(0, 1000, 150)]
+    assert np.allclose(np.concatenate(chunks)[:1000], whole, atol=1e-5)
+    assert np.abs(whole).max() > 2
+
+    device = Dummy(models=[EMGBursts(rate=5, channels=[1])], seed=0)
+    emg = device.generate(0, 5000)
+    assert np.all(emg[:, 0] == 0) and np.any(emg[:, 1] != 0)
+
+
+def test_dummy_rate():
+    sfreq, duration = 16000, 1.0
+    device = Dummy(n_chans=256, sfreq=sfreq, source_id='DummyRate',
+                   shared_memory=True)
+    thread = threading.Thread(target=device.start_streaming,
+                              args=(duration,))
+    thread.start()
+    inlet = device.get_stream_inlet(timeout=5)
+    inlet.reader.position = 0
+    start = time.monotonic()
+    thread.join()
+    elapsed = time.monotonic() - start
+    n_samples = inlet.ring_buffer.n_written
+    inlet.close()
+    assert n_samples == sfreq * duration
+    # No drift: all samples are pushed close to the nominal time
+    assert elapsed < duration * 1.2
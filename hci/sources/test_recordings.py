@@ -0,0 +1,35 @@
+import os
+import tempfile
+
+import numpy as np
+
+from hci.sources.recordings import cached_arrays, load_table
+
+
+def test_cached_arrays():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'session_bci.csv')
+        table = np.random.normal(size=(20, 3))
+        np.savetxt(path, table, delimiter=';')
+        assert np.allclose(load_table(path), table)
+
+        calls = []
+
+        def compute():
+            calls.append(1)
+            data = load_table(path)
+            return data * 2, np.arange(len(data))
+
+        for params in [(1,), (1,), (np.ones(3),), (np.ones(3),)]:
+            doubled, index = cached_arrays([path], 'doubled', compute, params)
+        assert len(calls) == 2
+        assert isinstance(doubled, np.memmap) and np.allclose(doubled,
+                                                              table * 2)
+        assert np.array_equal(index, np.arange(20))
+
+        # Changed recording invalidates the cache, stale files are removed
+        np.savetxt(path, table[:10], delimiter=';')
+        doubled, index = cached_arrays([path], 'doubled', compute, (1,))
+        assert len(calls) == 3 and len(doubled) == 10
+        cache_files = os.listdir(os.path.join(directory, '.cache'))
+        assert len([name for name in cache_files if 'doubled' in name]) == 2
@@ -0,0 +1,50 @@
+import glob
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from hci.sources.recordings import cache_prefix
+from hci.sources.replay import Replay
+
+
+def write_recording(path, sfreq=250, duration=1.0, n_chans=3):
+    timestamps = 100 + np.arange(int(sfreq * duration)) / sfreq
+    data = np.random.normal(size=(len(timestamps), n_chans))
+    np.savetxt(path + '_bci.csv', np.hstack([timestamps[:, None], data]),
+               delimiter=';')
+    markers = np.array([[100.1, 1], [100.5, 0], [100.9, 2]])
+    np.savetxt(path + '_experiment.csv', markers, delimiter=';')
+    return timestamps, data, markers
+
+
+def test_replay():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'session')
+        timestamps, data, markers = write_recording(path)
+
+        replay = Replay(path=path, speed=None, source_id='TestReplay',
+                        shared_memory=True)
+        assert replay.sfreq == 250 and replay.n_chans == 3
+        assert glob.glob(cache_prefix([path + '_bci.csv'], 'table') + '*')
+
+        thread = threading.Thread(target=replay.start_streaming)
+        thread.start()
+        inlet = replay.get_stream_inlet(timeout=5)
+        marker_inlet = replay.markers.get_stream_inlet(timeout=5)
+        thread.join()
+
+        inlet.reader.position = marker_inlet.reader.position = 0
+        samples, sample_times = inlet.pull_chunk(max_samples=10000)
+        marks, mark_times = marker_inlet.pull_chunk()
+        assert np.allclose(samples, data, atol=1e-5)
+        # Relative timestamps of both streams are kept
+        assert np.allclose(np.diff(sample_times), np.diff(timestamps))
+        assert np.allclose(np.array(mark_times) - sample_times[0],
+                           markers[:, 0] - timestamps[0])
+        assert np.array_equal(np.ravel(marks), markers[:, 1])
+        inlet.close()
+        marker_inlet.close()
+        replay.stream_outlet.close()
+        replay.marker_outlet.close()
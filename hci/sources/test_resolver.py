@@ -0,0 +1,28 @@
+import time
+
+from pylsl import StreamInfo, StreamOutlet
+
+from hci.sources import resolver as resolver_module
+from hci.sources.resolver import StreamResolver
+
+
+def test_resolver_cache(monkeypatch):
+    resolver = StreamResolver(refresh_interval=0.05, forget_after=1.0)
+    outlet = StreamOutlet(StreamInfo(source_id='TestResolver'))
+    assert len(resolver.resolve('TestResolver', timeout=5)) == 1
+
+    # Known stream is returned from the cache, without direct resolving
+    with monkeypatch.context() as patch:
+        def resolve_byprop(*args, **kwargs):
+            raise AssertionError('Stream is not in the cache')
+        patch.setattr(resolver_module, 'resolve_byprop', resolve_byprop)
+        stream_info = resolver.resolve_one('TestResolver', timeout=5)
+    assert stream_info.source_id() == 'TestResolver'
+
+    # Restarted source is found with the new stream
+    del outlet
+    outlet = StreamOutlet(StreamInfo(source_id='TestResolver'))
+    time.sleep(2.0)
+    assert resolver.resolve_one('TestResolver', timeout=5).uid() ==\
+        outlet.get_info().uid()
+    assert resolver.resolve('TestResolverMissing', timeout=0.2) == []
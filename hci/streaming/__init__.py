@@ -1 +1,6 @@
-from .signal_interface import WindowedSignal, MaskController
\ No newline at end of file
+from .signal_interface import WindowedSignal, MaskController, Epoch
+from .ring_buffer import RingBuffer, RingReader
+from .broker import SignalBroker, Subscription
+from .alignment import StreamAligner, Segment, segment_epochs
+from .welch import IncrementalWelch
+from .filters import IIRFilter, FIRFilter
@@ -0,0 +1,168 @@
+"""Online alignment of signal streams with marker stream.
+
+Each marker starts a segment, labelled with the marker value, which lasts
+until the next marker. `StreamAligner` buffers samples of all streams with
+corrected timestamps and emits segments as soon as the next marker came and
+every signal stream passed it, so labelled epochs are available during the
+experiment, not only after the recording is saved.
+"""
+from collections import namedtuple
+
+import numpy as np
+from pylsl import StreamInlet, IRREGULAR_RATE
+
+from .ring_buffer import RingBuffer
+from .signal_interface import make_ring_buffer, pull_into, get_between,\
+    StreamClock
+
+Segment = namedtuple('Segment', [
+    'label',  # value of the marker, scalar for one channel marker stream
+    't0',  # timestamp of the marker
+    't1',  # timestamp of the next marker
+    'signals',  # dict of stream name to (data, timestamps) in (t0, t1)
+])
+
+
+class AlignedStream:
+    """Buffers of samples and corrected timestamps of one inlet.
+
+    Parameters
+    ----------
+    stream_inlet
+
+    buffer_duration : float
+        Buffer length in seconds for regular streams.
+
+    irregular_capacity : int
+        Buffer length in samples for streams with irregular rate.
+
+    dejitter : bool
+        Dejitter timestamps of regular streams, see `StreamClock`.
+    """
+    def __init__(self, stream_inlet: StreamInlet, buffer_duration=60.0,
+                 irregular_capacity=1024, dejitter=True):
+        self.stream_inlet = stream_inlet
+        stream_info = stream_inlet.info()
+        self.sfreq = stream_info.nominal_srate()
+        self.regular = self.sfreq != IRREGULAR_RATE
+        capacity = int(self.sfreq * buffer_duration) if self.regular else\
+            irregular_capacity
+        self.ring_buffer = make_ring_buffer(stream_info, capacity)
+        self.timestamp_buffer = RingBuffer(capacity)
+        self.clock = StreamClock(stream_inlet, self.sfreq,
+                                 dejitter and self.regular)
+
+    def pull(self):
+        return pull_into(self.stream_inlet, self.ring_buffer,
+                         self.timestamp_buffer, self.clock)
+
+    @property
+    def last_timestamp(self):
+        """Timestamp of the latest sample, -inf if there were none."""
+        if self.timestamp_buffer.n_written == 0:
+            return -np.inf
+        return self.timestamp_buffer.latest(1)[0]
+
+    def get_between(self, t0, t1):
+        """Returns copies of samples and timestamps in (t0, t1)."""
+        data, timestamps = get_between(self.ring_buffer,
+                                       self.timestamp_buffer, t0, t1,
+                                       strict=True)
+        return data.copy(), timestamps.copy()
+
+
+class StreamAligner:
+    """Aligns signal streams with marker stream online.
+
+    Parameters
+    ----------
+    inlets : dict
+        Inlets by stream name, regular and irregular.
+
+    markers : str
+        Name of the marker stream in inlets.
+
+    buffer_duration : float
+        Buffer length of signal streams in seconds, the longest segment
+        which is returned completely.
+
+    dejitter : bool
+        Dejitter timestamps of regular streams.
+
+    Examples
+    --------
+    >>> aligner = StreamAligner({'bci': bci_inlet,
+    ...                          'experiment': experiment_inlet},
+    ...                         markers='experiment')
+    >>> while True:
+    ...     for segment in aligner.update():
+    ...         x, y = segment_epochs(segment, 'bci', epoch_len, epoch_step)
+    """
+    def __init__(self, inlets: dict, markers: str, buffer_duration=60.0,
+                 dejitter=True):
+        self.streams = {name: AlignedStream(inlet, buffer_duration,
+                                            dejitter=dejitter)
+                        for name, inlet in inlets.items()}
+        self.markers = markers
+        self.signals = [name for name, stream in self.streams.items()
+                        if name != markers]
+        # Index of the marker, which starts the next segment
+        self.next_marker = 0
+
+    def pull(self):
+        for stream in self.streams.values():
+            stream.pull()
+
+    def update(self) -> list:
+        """Pulls all inlets and returns list of completed `Segment`."""
+        self.pull()
+        markers = self.streams[self.markers]
+        n_markers = markers.ring_buffer.n_written
+        # Markers could be overwritten, if update was not called for long
+        self.next_marker = max(self.next_marker,
+                               n_markers - markers.ring_buffer.capacity)
+
+        segments = []
+        while self.next_marker + 1 < n_markers:
+            i = self.next_marker
+            t0, t1 = markers.timestamp_buffer.get(i, i + 2)
+            if any(self.streams[name].last_timestamp < t1
+                   for name in self.signals):
+                # Some samples of the segment may still come
+                break
+            label = markers.ring_buffer.get(i, i + 1)[0].copy()
+            if label.shape == (1,):
+                label = label[0]
+            signals = {name: self.streams[name].get_between(t0, t1)
+                       for name in self.signals}
+            segments.append(Segment(label, t0, t1, signals))
+            self.next_marker += 1
+        return segments
+
+
+def segment_epochs(segment: Segment, name, epoch_len, epoch_step,
+                   cut_begin=0, cut_end=0):
+    """Splits signal of segment into labelled epochs.
+
+    Epochs start every epoch_step samples, cut_begin and cut_end samples are
+    dropped at the borders of segment, as in `gesture_detector.get_epochs`.
+
+    Returns
+    -------
+    x : np.ndarray
+        Epochs (n_epochs, epoch_len, n_chans).
+
+    y : np.ndarray
+        Labels (n_epochs,).
+    """
+    data = segment.signals[name][0]
+    starts = np.arange(cut_begin, len(data) - cut_end - epoch_len, epoch_step)
+    if len(starts) == 0:
+        return np.zeros((0, epoch_len) + data.shape[1:], data.dtype),\
+            np.zeros(0, dtype=int)
+    windows = np.lib.stride_tricks.sliding_window_view(data, epoch_len,
+                                                       axis=0)
+    # Windows are (n_windows, n_chans, epoch_len)
+    x = np.moveaxis(windows[starts], -1, 1)
+    y = np.full(len(starts), int(segment.label))
+    return x, y
@@ -0,0 +1,80 @@
+"""Benchmark of WindowedSignal against the deque-based window.
+
+Run with `python -m hci.streaming.bench_signal_interface`.
+"""
+import collections
+import timeit
+
+import numpy as np
+from pylsl import StreamInfo
+
+from hci.streaming.signal_interface import WindowedSignal
+
+
+class FakeInlet:
+    """Inlet returning chunk_size new samples on each pull."""
+    def __init__(self, n_chans, sfreq, chunk_size):
+        self.stream_info = StreamInfo(channel_count=n_chans,
+                                      nominal_srate=sfreq, source_id='Bench')
+        self.chunk = np.random.normal(size=(chunk_size, n_chans))\
+            .astype(np.float32)
+        self.chunk_list = self.chunk.tolist()
+        self.sfreq = sfreq
+        self.n_pulled = 0
+        self.pending = 0
+
+    def info(self):
+        return self.stream_info
+
+    def pull_chunk(self, max_samples, dest_obj=None):
+        if self.pending == 0:
+            self.pending = len(self.chunk)
+        n = min(max_samples, self.pending)
+        self.pending -= n
+        timestamps = [(self.n_pulled + i) / self.sfreq for i in range(n)]
+        self.n_pulled += n
+        if dest_obj is None:
+            return self.chunk_list[:n], timestamps
+        dest_obj[:n] = self.chunk[:n]
+        return None, timestamps
+
+    def time_correction(self, timeout=None):
+        return 0.0
+
+
+class DequeSignal:
+    """Previous implementation of WindowedSignal window."""
+    def __init__(self, stream_inlet, window):
+        self.stream_inlet = stream_inlet
+        self.epoch_len = int(stream_inlet.info().nominal_srate() * window)
+        self.deque = collections.deque(maxlen=self.epoch_len)
+
+    def get_epoch(self):
+        new_data = self.stream_inlet.pull_chunk(max_samples=self.epoch_len)[0]
+        if new_data:
+            self.deque.extend(new_data)
+        return np.array(self.deque)
+
+
+def main(sfreq=250, chunk_size=15, number=200):
+    print('get_epoch time, ms ({} new samples per call)'.format(chunk_size))
+    print('{:>8} {:>8} {:>10} {:>10} {:>8}'.format(
+        'window', 'n_chans', 'deque', 'ring', 'speedup'))
+    for window in [1.0, 2.0, 10.0]:
+        for n_chans in [8, 16, 64]:
+            times = []
+            for signal_class in [DequeSignal, WindowedSignal]:
+                inlet = FakeInlet(n_chans, sfreq, chunk_size)
+                signal = signal_class(inlet, window)
+                # Fill the window first
+                for _ in range(signal.epoch_len // chunk_size + 1):
+                    signal.get_epoch()
+                times.append(timeit.timeit(signal.get_epoch,
+                                           number=number) / number)
+            print('{:8.1f} {:8d} {:10.3f} {:10.3f} {:8.1f}'.format(
+                window, n_chans, times[0] * 1000, times[1] * 1000,
+                times[0] / times[1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Benchmark of IncrementalWelch against scipy.signal.welch of each window.
+
+Run with `python -m hci.streaming.bench_welch`.
+"""
+import timeit
+
+import numpy as np
+import scipy.signal as sig
+
+from hci.streaming.welch import IncrementalWelch
+
+
+def main(fs=250, n_chans=8, nperseg=256, number=20):
+    print('welch time, ms per window ({} channels at {} Hz, nperseg {})'
+          .format(n_chans, fs, nperseg))
+    print('{:>8} {:>8} {:>10} {:>12} {:>8}'.format(
+        'window', 'hop', 'scipy', 'incremental', 'speedup'))
+    data = np.random.normal(size=(60 * fs, n_chans))
+    for window, hop in [(2 * fs, 128), (10 * fs, 128), (10 * fs, 256),
+                        (30 * fs, 128), (10 * fs, 25)]:
+        ends = np.arange(window, len(data), hop)
+
+        def scipy_welch():
+            for end in ends:
+                sig.welch(data[end - window:end].T, fs, nperseg=nperseg)
+
+        def incremental():
+            welch = IncrementalWelch(fs, nperseg)
+            for end in ends:
+                welch.psd(data[end - window:end], end)
+
+        times = [timeit.timeit(f, number=number) / number / len(ends)
+                 for f in [scipy_welch, incremental]]
+        print('{:8d} {:8d} {:10.3f} {:12.3f} {:8.1f}'.format(
+            window, hop, times[0] * 1000, times[1] * 1000,
+            times[0] / times[1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+import time
+
+from pylsl import StreamInlet, IRREGULAR_RATE
+
+from .ring_buffer import RingBuffer
+from .signal_interface import make_ring_buffer, pull_into, next_epoch,\
+    get_between, StreamClock, aiter_epochs
+
+
+class SignalBroker:
+    """Owns stream inlet and shares its data between several consumers.
+
+    Broker pulls the inlet at most once per tick into one ring buffer.
+    Subscribers read their windows from this buffer, so each new consumer
+    costs neither inlet traffic nor extra buffering.
+
+    Parameters
+    ----------
+    stream_inlet
+        Stream inlet, prepared for data transmission.
+
+    max_window : float
+        Length of the longest window of subscribers in seconds.
+
+    tick : float
+        Minimal time between inlet pulls in seconds.
+
+    dejitter : bool
+        Smooth timestamps by linear regression, see `StreamClock`.
+    """
+    def __init__(self, stream_inlet: StreamInlet, max_window: float,
+                 tick=0.02, dejitter=True):
+        self.stream_inlet = stream_inlet
+        self.max_window = max_window
+        self.tick = tick
+        stream_info = stream_inlet.info()
+
+        self.sfreq = stream_info.nominal_srate()
+        assert self.sfreq != IRREGULAR_RATE
+        self.n_chans = stream_info.channel_count()
+        capacity = int(self.sfreq * max_window)
+        assert capacity > 0
+        self.ring_buffer = make_ring_buffer(stream_info, capacity)
+        self.timestamp_buffer = RingBuffer(capacity)
+        self.clock = StreamClock(stream_inlet, self.sfreq, dejitter)
+        self.last_pull = None
+
+    def pull(self):
+        """Pulls inlet, if it was not pulled during current tick."""
+        now = time.monotonic()
+        if self.last_pull is not None and now - self.last_pull < self.tick:
+            return 0
+        self.last_pull = now
+        return pull_into(self.stream_inlet, self.ring_buffer,
+                         self.timestamp_buffer, self.clock)
+
+    def get_between(self, t0, t1):
+        """Returns stored samples and timestamps for timestamps in
+        [t0, t1)."""
+        self.pull()
+        return get_between(self.ring_buffer, self.timestamp_buffer, t0, t1)
+
+    def subscribe(self, window: float=None, hop: int=None):
+        """Creates new consumer of the stream.
+
+        Parameters
+        ----------
+        window : float
+            Epoch length in seconds, max_window by default.
+
+        hop : int, optional
+            Step between epochs in samples. If set, epochs follow each other
+            with this step, otherwise each epoch is the latest window.
+        """
+        if window is None:
+            window = self.max_window
+        subscription = Subscription(self, window, hop)
+        self.reserve_backlog(subscription.epoch_len, hop)
+        return subscription
+
+    def reserve_backlog(self, epoch_len: int, hop: int=None):
+        """Grows the buffer to keep epochs of epoch_len samples with given
+        hop for a subscriber, which is late, see
+        `WindowedSignal.reserve_backlog`."""
+        if hop is None:
+            return
+        assert hop > 0
+        capacity = epoch_len + max(hop, epoch_len)
+        if self.ring_buffer.capacity < capacity:
+            self.ring_buffer = self.ring_buffer.resized(capacity)
+            self.timestamp_buffer = self.timestamp_buffer.resized(capacity)
+
+
+class Subscription:
+    """Consumer of `SignalBroker` with own window, hop and position. It can be
+    used instead of WindowedSignal.
+
+    Parameters
+    ----------
+    broker : SignalBroker
+
+    window : float
+        Epoch length in seconds.
+
+    hop : int, optional
+        Step between epochs in samples.
+    """
+    def __init__(self, broker: SignalBroker, window: float, hop: int=None):
+        self.broker = broker
+        self.window = window
+        self.hop = hop
+        self.sfreq = broker.sfreq
+        self.n_chans = broker.n_chans
+        self.epoch_len = int(self.sfreq * window)
+        assert 0 < self.epoch_len <= broker.ring_buffer.capacity
+        # Index of the last returned epoch
+        self.position = broker.ring_buffer.n_written
+
+    def __iter__(self):
+        for epoch in self.epochs():
+            yield None if epoch is None else epoch.data
+
+    def epochs(self):
+        while True:
+            yield self.get_next_epoch()
+
+    @property
+    def ring_buffer(self):
+        return self.broker.ring_buffer
+
+    @property
+    def clock(self):
+        return self.broker.clock
+
+    def aiter(self, hop: int=None):
+        """Asynchronous iterator of epochs, see `aiter_epochs`."""
+        self.broker.reserve_backlog(self.epoch_len,
+                                    self.hop if hop is None else hop)
+        return aiter_epochs(self, hop)
+
+    def get_next_epoch(self, hop: int=None):
+        """Returns the next `Epoch` or None, see `next_epoch`.
+
+        Epoch data may be a view into the shared buffer, it is valid until the
+        next pull and must not be changed.
+        """
+        self.broker.pull()
+        if hop is None:
+            hop = self.hop
+        epoch = next_epoch(self.broker.ring_buffer, self.position,
+                           self.epoch_len, hop)
+        if epoch is not None:
+            self.position = epoch.index
+        return epoch
+
+    def get_epoch(self):
+        """Returns up to epoch_len latest samples."""
+        self.broker.pull()
+        ring_buffer = self.broker.ring_buffer
+        self.position = ring_buffer.n_written
+        return ring_buffer.latest(self.epoch_len)
+
+    def get_timestamps(self, start, stop):
+        """Returns timestamps of samples with indices in [start, stop)."""
+        return self.broker.timestamp_buffer.get(start, stop)
+
+    def get_between(self, t0, t1):
+        return self.broker.get_between(t0, t1)
@@ -0,0 +1,72 @@
+import numpy as np
+
+
+class ClockRegression:
+    """Online linear regression of timestamps on sample counter.
+
+    Fits t = offset + slope * n with exponential forgetting, so that offset
+    and slope follow slow clock drift, while jitter of individual timestamps
+    is averaged out.
+
+    Parameters
+    ----------
+    nominal_slope : float
+        Expected time between consecutive counter values, 1 / sfreq. It is
+        used until there are enough points to estimate the slope.
+
+    halflife : float
+        Number of points after which weight of a point is halved.
+
+    min_points : int
+        Number of points required to estimate slope.
+
+    """
+    def __init__(self, nominal_slope, halflife=1000, min_points=10):
+        self.nominal_slope = nominal_slope
+        self.decay = 0.5 ** (1 / halflife)
+        self.min_points = min_points
+
+        self.n_points = 0
+        # Points are centered on the first one to keep precision.
+        self.n0 = self.t0 = None
+        self.sw = self.sn = self.st = self.snn = self.snt = 0.0
+
+    def update(self, n, t):
+        """Adds points (n, t), scalars or 1d arrays."""
+        n = np.atleast_1d(np.asarray(n, dtype=np.float64))
+        t = np.atleast_1d(np.asarray(t, dtype=np.float64))
+        if len(n) == 0:
+            return
+        if self.n0 is None:
+            self.n0, self.t0 = n[0], t[0]
+        n = n - self.n0
+        t = t - self.t0
+
+        w = self.decay ** np.arange(len(n) - 1, -1, -1)
+        forget = self.decay ** len(n)
+        self.sw = forget * self.sw + w.sum()
+        self.sn = forget * self.sn + w.dot(n)
+        self.st = forget * self.st + w.dot(t)
+        self.snn = forget * self.snn + w.dot(n * n)
+        self.snt = forget * self.snt + w.dot(n * t)
+        self.n_points += len(n)
+
+    @property
+    def slope(self):
+        if self.n_points >= self.min_points:
+            var = self.snn * self.sw - self.sn ** 2
+            if var > 0:
+                return (self.snt * self.sw - self.sn * self.st) / var
+        return self.nominal_slope
+
+    @property
+    def offset(self):
+        """Predicted time for counter value n0."""
+        if self.n_points == 0:
+            raise ValueError('No points to estimate offset')
+        return self.t0 + (self.st - self.slope * self.sn) / self.sw
+
+    def predict(self, n):
+        """Returns fitted timestamps for counter values n."""
+        n = np.asarray(n, dtype=np.float64)
+        return self.offset + self.slope * (n - self.n0)
@@ -0,0 +1,96 @@
+"""Filter designs and stateful filters for chunked signals.
+
+Designs are cached by their parameters, filters keep their state between
+chunks, so each sample is filtered once and the result is the same as
+filtering the whole signal at once from zero state.
+"""
+import functools
+
+import numpy as np
+import scipy.signal as sig
+
+
+def cached_design(design):
+    """Caches filter design by its arguments, which should be hashable.
+
+    Returned arrays are shared by all callers and should not be modified.
+    """
+    return functools.lru_cache(maxsize=64)(design)
+
+
+@cached_design
+def butter_sos(order, low, high=None, btype='bandpass'):
+    """Butterworth filter in sos format, frequencies are relative to
+    Nyquist frequency."""
+    freqs = low if high is None else (low, high)
+    return sig.butter(order, freqs, btype=btype, analog=False, output='sos')
+
+
+class IIRFilter:
+    """IIR filter in sos format, filtering chunks along the first axis.
+
+    Parameters
+    ----------
+    sos : np.ndarray
+        Second-order sections, e.g. of `butter_sos`.
+    """
+    def __init__(self, sos):
+        self.sos = np.asarray(sos)
+        self.reset()
+
+    def reset(self):
+        """Returns filter to zero state."""
+        self.zi = None
+
+    def __call__(self, x):
+        """Returns filtered chunk x (n_samples, ...)."""
+        x = np.asarray(x, dtype=np.float64)
+        if self.zi is None:
+            self.zi = np.zeros((len(self.sos), 2) + x.shape[1:])
+        y, self.zi = sig.sosfilt(self.sos, x, axis=0, zi=self.zi)
+        return y
+
+
+class FIRFilter:
+    """FIR filter, filtering chunks along the first axis.
+
+    Filter keeps the last len(b) - 1 input samples and convolves them with
+    each chunk, keeping only the complete outputs, i.e. overlap-save. Long
+    filters of long chunks are convolved via FFT.
+
+    Parameters
+    ----------
+    b : np.ndarray
+        Filter taps, as for `scipy.signal.lfilter(b, 1, x)`.
+
+    method : {'auto', 'direct', 'fft'}
+        Convolution method, 'auto' chooses the faster one by size.
+    """
+    def __init__(self, b, method='auto'):
+        self.b = np.asarray(b, dtype=np.float64)
+        assert self.b.ndim == 1 and len(self.b) > 0
+        assert method in ('auto', 'direct', 'fft')
+        self.method = method
+        self.reset()
+
+    def reset(self):
+        """Returns filter to zero state."""
+        self.history = None
+
+    def __call__(self, x):
+        """Returns filtered chunk x (n_samples, ...)."""
+        x = np.asarray(x, dtype=np.float64)
+        if self.history is None:
+            self.history = np.zeros((len(self.b) - 1,) + x.shape[1:])
+        if len(x) == 0:
+            return x.copy()
+        extended = np.concatenate((self.history, x))
+        self.history = extended[len(x):]
+
+        kernel = self.b.reshape((-1,) + (1,) * (x.ndim - 1))
+        method = self.method
+        if method == 'auto':
+            method = sig.choose_conv_method(extended, kernel, mode='valid')
+        if method == 'fft':
+            return sig.oaconvolve(extended, kernel, mode='valid', axes=0)
+        return sig.convolve(extended, kernel, mode='valid', method='direct')
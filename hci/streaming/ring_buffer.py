@@ -0,0 +1,233 @@
+import threading
+import time
+
+import numpy as np
+
+
+class RingBuffer:
+    """Preallocated circular buffer of samples.
+
+    There is one writer and any number of readers. Writer never waits for
+    readers: it copies samples into the buffer and then advances the sample
+    counter, so readers see only completely written samples. Slow readers
+    lose the oldest samples, see `RingReader`.
+
+    Parameters
+    ----------
+    capacity : int
+        Number of samples kept in the buffer.
+
+    shape : tuple
+        Shape of one sample, e.g. (n_chans,).
+
+    dtype
+        Data type of the buffer, structured types are supported.
+
+    """
+    def __init__(self, capacity, shape=(), dtype=np.float64):
+        assert capacity > 0
+        self.capacity = capacity
+        self.data = np.zeros((capacity,) + tuple(shape), dtype=dtype)
+        # Total number of samples written and total number of samples that
+        # writer started to write. Only writer changes them.
+        self.n_written = 0
+        self.n_reserved = 0
+        self._condition = threading.Condition()
+
+    def write(self, samples):
+        """Appends samples to the buffer, overwriting the oldest ones."""
+        n = len(samples)
+        if n == 0:
+            return
+        self.n_reserved = self.n_written + n
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+
+        start = (self.n_reserved - len(samples)) % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self.data[start:start + first] = samples[:first]
+        self.data[:len(samples) - first] = samples[first:]
+
+        self.n_written = self.n_reserved
+        self._notify()
+
+    def reserve(self, max_samples):
+        """Returns view of the buffer where next samples are to be written,
+        up to its end. Writer fills it in place, e.g. with
+        pull_chunk(dest_obj=...), and calls `commit`."""
+        start = self.n_written % self.capacity
+        n = min(max_samples, self.capacity - start)
+        self.n_reserved = self.n_written + n
+        return self.data[start:start + n]
+
+    def commit(self, n):
+        """Marks first n samples of the reserved view as written."""
+        self.n_written += n
+        self.n_reserved = self.n_written
+        if n > 0:
+            self._notify()
+
+    def _notify(self):
+        # Waiting readers poll anyway, so writer does not wait for the lock.
+        if self._condition.acquire(blocking=False):
+            try:
+                self._condition.notify_all()
+            finally:
+                self._condition.release()
+
+    @property
+    def n_available(self):
+        """Number of samples currently stored."""
+        return min(self.n_written, self.capacity)
+
+    def get(self, start, stop):
+        """Returns samples with indices in [start, stop).
+
+        Indices count all samples ever written. Result is a read-only view
+        into the buffer when the samples are contiguous in memory, otherwise
+        a copy. Views are overwritten by later writes, copy them to keep or
+        change data.
+        """
+        assert 0 <= stop - start <= self.capacity
+        i = start % self.capacity
+        j = i + stop - start
+        if j <= self.capacity:
+            view = self.data[i:j]
+            view.flags.writeable = False
+            return view
+        else:
+            return np.concatenate((self.data[i:],
+                                   self.data[:j - self.capacity]))
+
+    def latest(self, n):
+        """Returns up to n latest samples, see `get`."""
+        n_written = self.n_written
+        return self.get(max(n_written - min(n, self.capacity), 0), n_written)
+
+    def resized(self, capacity):
+        """Returns new buffer of given capacity with the latest samples and
+        the same sample indices."""
+        ring_buffer = RingBuffer(capacity, self.data.shape[1:],
+                                 self.data.dtype)
+        samples = self.latest(capacity)
+        ring_buffer.n_written = ring_buffer.n_reserved =\
+            self.n_written - len(samples)
+        ring_buffer.write(samples)
+        return ring_buffer
+
+    def searchsorted(self, value, side='left'):
+        """Finds index where value would be inserted into stored samples,
+        like `numpy.searchsorted`. Samples must be sorted scalars.
+
+        Returns
+        -------
+        index : int
+            Sample index, counting all samples ever written, between the
+            oldest stored sample and n_written.
+        """
+        n_written = self.n_written
+        start = max(n_written - self.capacity, 0)
+        i = start % self.capacity
+        # Stored samples are data[i:] followed by data[:i] for full buffer.
+        first = self.data[i:i + n_written - start]
+        index = np.searchsorted(first, value, side)
+        if index == len(first) and i > 0:
+            index += np.searchsorted(self.data[:i], value, side)
+        return start + int(index)
+
+    def wait(self, n_written, timeout=None, poll_interval=0.05):
+        """Waits until at least n_written samples were written in total.
+
+        Returns
+        -------
+        success : bool
+            False if timeout expired first.
+
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self.n_written < n_written:
+                # Notification could be skipped by writer, so wake up
+                # regularly.
+                interval = poll_interval
+                if deadline is not None:
+                    interval = min(interval, deadline - time.monotonic())
+                    if interval <= 0:
+                        return False
+                self._condition.wait(interval)
+        return True
+
+    def reader(self, position=None):
+        """Creates new reader, starting from current end of buffer by
+        default."""
+        return RingReader(self, position)
+
+
+class RingReader:
+    """Cursor over `RingBuffer`, returns each sample once.
+
+    Parameters
+    ----------
+    ring_buffer : RingBuffer
+
+    position : int, optional
+        Index of the first sample to read, current end of buffer by default.
+
+    Attributes
+    ----------
+    high_water_mark : int
+        Maximal number of unread samples seen by this reader.
+
+    n_overflows : int
+        Number of reads that found some unread samples overwritten.
+
+    n_lost : int
+        Total number of samples overwritten before being read.
+
+    """
+    def __init__(self, ring_buffer: RingBuffer, position=None):
+        self.ring_buffer = ring_buffer
+        if position is None:
+            position = ring_buffer.n_written
+        self.position = position
+        self.high_water_mark = 0
+        self.n_overflows = 0
+        self.n_lost = 0
+
+    @property
+    def n_pending(self):
+        """Number of written, but not yet read samples."""
+        return self.ring_buffer.n_written - self.position
+
+    def wait(self, n_samples=1, timeout=None):
+        """Waits until n_samples unread samples are available."""
+        return self.ring_buffer.wait(self.position + n_samples, timeout)
+
+    def read(self, max_samples=None):
+        """Returns copy of unread samples and moves cursor past them."""
+        ring_buffer = self.ring_buffer
+        n_written = ring_buffer.n_written
+        self.high_water_mark = max(self.high_water_mark,
+                                   n_written - self.position)
+        self.position += self._count_lost(n_written, n_written)
+
+        stop = n_written
+        if max_samples is not None:
+            stop = min(stop, self.position + max_samples)
+        samples = ring_buffer.get(self.position, stop).copy()
+
+        # Writer could overwrite beginning of the range while we copied it.
+        n_overwritten = self._count_lost(ring_buffer.n_reserved, stop)
+        self.position = stop
+        return samples[n_overwritten:]
+
+    def _count_lost(self, n_reserved, stop):
+        """Counts unread samples before stop, which are overwritten when
+        n_reserved samples are written."""
+        oldest = min(n_reserved - self.ring_buffer.capacity, stop)
+        n_lost = oldest - self.position
+        if n_lost > 0:
+            self.n_overflows += 1
+            self.n_lost += n_lost
+            return n_lost
+        return 0
@@ -0,0 +1,307 @@
+"""Shared memory transport of stream samples between processes of one host.
+
+Producer writes samples with timestamps into `SharedRingBuffer`, placed in a
+`multiprocessing.shared_memory` block named after the source. The write
+counter is stored in the block too, so each consumer process keeps its own
+`RingReader` cursor over the same memory and may read samples as NumPy views
+without copying. `SharedMemoryOutlet` and `SharedMemoryInlet` follow the
+interface of pylsl outlet and inlet, outlet also forwards samples to LSL
+outlet for remote consumers.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+from pylsl import StreamInfo, StreamOutlet, IRREGULAR_RATE, FOREVER,\
+    local_clock
+
+from .ring_buffer import RingBuffer
+from .signal_interface import CHANNEL_FORMAT2DTYPE
+
+# Write counter, reserve counter, capacity, metadata length, owner pid,
+# ready marker
+HEADER_SIZE = 6 * 8
+METADATA_SIZE = 1024
+# Ready marker, written when the buffer is initialized
+READY = int.from_bytes(b'hcirdy\x00\x00', 'little')
+# Before Python 3.13 resource tracker registers blocks, which are only opened
+TRACKED_ON_OPEN = os.name == 'posix' and sys.version_info < (3, 13)
+
+
+def shared_memory_name(source_id):
+    """Name of the shared memory block of source."""
+    return 'hci_{}'.format(source_id)
+
+
+def stream_info2metadata(stream_info: StreamInfo):
+    return {'name': stream_info.name(), 'type': stream_info.type(),
+            'channel_count': stream_info.channel_count(),
+            'nominal_srate': stream_info.nominal_srate(),
+            'channel_format': stream_info.channel_format(),
+            'source_id': stream_info.source_id()}
+
+
+def process_alive(pid):
+    """Whether process with pid exists."""
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Process of another user
+        return True
+    return True
+
+
+def sample_dtype(metadata):
+    """Structured dtype of one sample: timestamp and channel data."""
+    return np.dtype([
+        ('timestamp', np.float64),
+        ('data', CHANNEL_FORMAT2DTYPE[metadata['channel_format']],
+         (metadata['channel_count'],))])
+
+
+class SharedRingBuffer(RingBuffer):
+    """`RingBuffer` with samples and counters in shared memory.
+
+    Use `create` in producer process and `attach` in consumers.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, owner=False):
+        self.shm = shm
+        self.owner = owner
+        header = np.ndarray((6,), dtype=np.int64, buffer=shm.buf)
+        self._counters = header[:2]
+        self.capacity = int(header[2])
+        self.owner_pid = int(header[4])
+        metadata = bytes(shm.buf[HEADER_SIZE:HEADER_SIZE + int(header[3])])
+        self.metadata = json.loads(metadata.decode())
+        self.data = np.ndarray((self.capacity,),
+                               dtype=sample_dtype(self.metadata),
+                               buffer=shm.buf,
+                               offset=HEADER_SIZE + METADATA_SIZE)
+        # Consumers in other processes are not notified and poll
+        self._condition = threading.Condition()
+
+    @classmethod
+    def create(cls, name, metadata, capacity):
+        """Creates buffer, owned by this process.
+
+        Existing buffer of the same name is replaced, if its owner process is
+        gone or did not finish its initialization, otherwise FileExistsError
+        is raised.
+        """
+        metadata = json.dumps(metadata).encode()
+        assert len(metadata) <= METADATA_SIZE
+        size = HEADER_SIZE + METADATA_SIZE +\
+            capacity * sample_dtype(json.loads(metadata.decode())).itemsize
+        try:
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            try:
+                existing = cls.attach(name)
+                owner_pid = existing.owner_pid
+                existing.close()
+            except FileNotFoundError:
+                # Not ready, its producer crashed during initialization
+                owner_pid = 0
+            if process_alive(owner_pid):
+                raise FileExistsError(
+                    'Shared memory {} is used by running process {}'.format(
+                        name, owner_pid))
+            # Left by a producer, which crashed
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+
+        header = np.ndarray((6,), dtype=np.int64, buffer=shm.buf)
+        header[:5] = [0, 0, capacity, len(metadata), os.getpid()]
+        shm.buf[HEADER_SIZE:HEADER_SIZE + len(metadata)] = metadata
+        # Block is visible by name already, consumers wait for the marker
+        header[5] = READY
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attaches to existing buffer, raises FileNotFoundError if there is
+        none or it is not initialized yet."""
+        if TRACKED_ON_OPEN:
+            # Otherwise resource tracker of consumer removes the block on
+            # exit. Owner registers it again before unlink, see `close`.
+            shm = shared_memory.SharedMemory(name)
+            resource_tracker.unregister('/' + shm.name, 'shared_memory')
+        else:
+            shm = shared_memory.SharedMemory(name, track=False)
+        if np.ndarray((6,), dtype=np.int64, buffer=shm.buf)[5] != READY:
+            shm.close()
+            raise FileNotFoundError(
+                'Shared memory {} is not initialized'.format(name))
+        return cls(shm)
+
+    @property
+    def n_written(self):
+        return int(self._counters[0])
+
+    @n_written.setter
+    def n_written(self, value):
+        self._counters[0] = value
+
+    @property
+    def n_reserved(self):
+        return int(self._counters[1])
+
+    @n_reserved.setter
+    def n_reserved(self, value):
+        self._counters[1] = value
+
+    def close(self):
+        # Views must be released before the memory is closed
+        self._counters = self.data = None
+        self.shm.close()
+        if self.owner:
+            if TRACKED_ON_OPEN:
+                # Consumers sharing the resource tracker, e.g. in this or a
+                # child process, unregistered the block, unlink unregisters it
+                # once more
+                resource_tracker.register('/' + self.shm.name,
+                                          'shared_memory')
+            self.shm.unlink()
+
+
+class SharedMemoryOutlet:
+    """Outlet writing samples into shared memory of the source.
+
+    Parameters
+    ----------
+    stream_info
+
+    capacity : int, optional
+        Number of samples kept, a minute of samples by default.
+
+    lsl_outlet : StreamOutlet, optional
+        Outlet receiving the same samples for remote consumers.
+    """
+    def __init__(self, stream_info: StreamInfo, capacity: int=None,
+                 lsl_outlet: StreamOutlet=None):
+        self.stream_info = stream_info
+        self.lsl_outlet = lsl_outlet
+        self.sfreq = stream_info.nominal_srate()
+        if capacity is None:
+            capacity = 1024 if self.sfreq == IRREGULAR_RATE else\
+                int(self.sfreq * 60)
+        self.ring_buffer = SharedRingBuffer.create(
+            shared_memory_name(stream_info.source_id()),
+            stream_info2metadata(stream_info), capacity)
+        atexit.register(self.close)
+
+    def push_sample(self, x, timestamp=0.0, pushthrough=True):
+        self.push_chunk([x], timestamp, pushthrough)
+
+    def push_chunk(self, x, timestamp=0.0, pushthrough=True):
+        """Pushes samples (n_samples, n_chans).
+
+        timestamp is either a list of timestamps or timestamp of the last
+        sample, earlier samples are back-dated by the sampling rate as in
+        LSL. 0.0 means current time.
+        """
+        if self.lsl_outlet is not None:
+            self.lsl_outlet.push_chunk(x, timestamp, pushthrough)
+        x = np.asarray(x)
+        n = len(x)
+        if n == 0:
+            return
+
+        samples = np.empty(n, dtype=self.ring_buffer.data.dtype)
+        samples['data'] = x
+        if np.ndim(timestamp) > 0:
+            samples['timestamp'] = timestamp
+        else:
+            if timestamp == 0.0:
+                timestamp = local_clock()
+            samples['timestamp'] = timestamp
+            if self.sfreq != IRREGULAR_RATE:
+                samples['timestamp'] -= np.arange(n - 1, -1, -1) / self.sfreq
+        self.ring_buffer.write(samples)
+
+    def close(self):
+        if self.ring_buffer.data is not None:
+            self.ring_buffer.close()
+
+
+class SharedMemoryInlet:
+    """Inlet reading samples of the source from shared memory.
+
+    Each inlet has its own cursor. `latest` gives zero-copy views of the
+    newest samples.
+
+    Parameters
+    ----------
+    source_id : str
+
+    timeout : float
+        Time to wait for the producer in seconds.
+    """
+    def __init__(self, source_id, timeout=FOREVER, poll_interval=0.05):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self.ring_buffer = SharedRingBuffer.attach(
+                    shared_memory_name(source_id))
+                break
+            except FileNotFoundError:
+                if time.monotonic() > deadline:
+                    raise ConnectionError(
+                        'No source {} found in shared memory'.format(
+                            source_id))
+                time.sleep(poll_interval)
+        self.reader = self.ring_buffer.reader()
+
+    def info(self) -> StreamInfo:
+        return StreamInfo(**self.ring_buffer.metadata)
+
+    def time_correction(self, timeout=FOREVER):
+        # Producer and consumer share the clock
+        return 0.0
+
+    def pull_chunk(self, timeout=0.0, max_samples=1024, dest_obj=None):
+        """Pulls unread samples like `pylsl.StreamInlet.pull_chunk`.
+
+        Returns
+        -------
+        samples : list or None
+            List of samples, None if dest_obj was filled.
+
+        timestamps : list
+        """
+        if timeout > 0.0 and self.reader.n_pending == 0:
+            self.reader.wait(1, timeout)
+        if dest_obj is not None:
+            max_samples = min(max_samples, len(dest_obj))
+        samples = self.reader.read(max_samples)
+        timestamps = samples['timestamp'].tolist()
+        if dest_obj is not None:
+            dest_obj[:len(samples)] = samples['data']
+            return None, timestamps
+        return samples['data'].tolist(), timestamps
+
+    def pull_sample(self, timeout=FOREVER):
+        samples, timestamps = self.pull_chunk(timeout, max_samples=1)
+        if not samples:
+            return None, None
+        return samples[0], timestamps[0]
+
+    def latest(self, n):
+        """Returns views of up to n latest samples and their timestamps.
+        Views are overwritten by the producer, copy them to keep data."""
+        samples = self.ring_buffer.latest(n)
+        return samples['data'], samples['timestamp']
+
+    def close(self):
+        self.ring_buffer.close()
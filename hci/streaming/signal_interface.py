@@ -1,11 +1,213 @@
-import collections
+import asyncio
+import time
 from abc import ABCMeta, abstractmethod
+from collections import namedtuple
 
 import numpy as np
 from scipy.signal import welch
 
 from pylsl import StreamInlet, IRREGULAR_RATE
 
+from .clock import ClockRegression
+from .ring_buffer import RingBuffer
+
+# Numeric LSL channel formats
+CHANNEL_FORMAT2DTYPE = {1: np.float32, 2: np.float64, 4: np.int32,
+                        5: np.int16, 6: np.int8, 7: np.int64}
+
+
+Epoch = namedtuple('Epoch', [
+    'data',  # (n_samples, n_chans)
+    'index',  # number of stream samples up to the end of epoch
+])
+
+
+def make_ring_buffer(stream_info, capacity):
+    """Ring buffer for samples of the stream."""
+    dtype = CHANNEL_FORMAT2DTYPE[stream_info.channel_format()]
+    return RingBuffer(capacity, shape=(stream_info.channel_count(),),
+                      dtype=dtype)
+
+
+class StreamClock:
+    """Converts timestamps of stream samples to the local clock.
+
+    Time correction of the inlet is added to timestamps and refreshed
+    regularly. With dejittering, timestamps are replaced by online linear
+    regression of timestamps on sample index, see `ClockRegression`.
+
+    Parameters
+    ----------
+    stream_inlet
+
+    sfreq : float
+        Nominal sampling rate.
+
+    dejitter : bool
+
+    correction_interval : float
+        Time between time_correction() calls in seconds.
+
+    halflife : float
+        Number of samples after which weight of a sample in regression is
+        halved.
+    """
+    def __init__(self, stream_inlet: StreamInlet, sfreq, dejitter=True,
+                 correction_interval=5.0, halflife=None):
+        self.stream_inlet = stream_inlet
+        self.correction_interval = correction_interval
+        self.correction = 0.0
+        self.last_correction = None
+        if halflife is None:
+            halflife = sfreq * 30
+        self.regression = ClockRegression(1 / sfreq, halflife=halflife) \
+            if dejitter else None
+
+    def correction_due(self):
+        """Whether time correction should be refreshed."""
+        return self.last_correction is None or\
+            time.monotonic() - self.last_correction >= self.correction_interval
+
+    def update_correction(self):
+        """Refreshes time correction, if it is due. Blocks up to 0.1 s."""
+        if not self.correction_due():
+            return
+        self.last_correction = time.monotonic()
+        try:
+            self.correction = self.stream_inlet.time_correction(timeout=0.1)
+        except RuntimeError:
+            # Timeout, keep the previous estimate
+            pass
+
+    def process(self, first_index, timestamps):
+        """Returns corrected timestamps of samples first_index, ..."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if len(timestamps) == 0:
+            return timestamps
+        self.update_correction()
+        timestamps = timestamps + self.correction
+        if self.regression is None:
+            return timestamps
+        indices = first_index + np.arange(len(timestamps))
+        self.regression.update(indices, timestamps)
+        return self.regression.predict(indices)
+
+
+def pull_into(stream_inlet: StreamInlet, ring_buffer: RingBuffer,
+              timestamp_buffer: RingBuffer=None, clock: StreamClock=None):
+    """Pulls all available samples from inlet straight into ring buffer.
+
+    Parameters
+    ----------
+    stream_inlet
+
+    ring_buffer : RingBuffer
+        Buffer for samples.
+
+    timestamp_buffer : RingBuffer, optional
+        Buffer of the same capacity for timestamps of samples.
+
+    clock : StreamClock, optional
+        Processing of timestamps before they are stored.
+
+    Returns
+    -------
+    n_samples : int
+        Number of new samples.
+    """
+    n_samples = 0
+    while True:
+        dest = ring_buffer.reserve(ring_buffer.capacity)
+        timestamps = stream_inlet.pull_chunk(max_samples=len(dest),
+                                             dest_obj=dest)[1]
+        if timestamp_buffer is not None and timestamps:
+            if clock is not None:
+                timestamps = clock.process(ring_buffer.n_written, timestamps)
+            # Timestamps are stored first, so that each visible sample has one
+            timestamp_buffer.write(timestamps)
+        ring_buffer.commit(len(timestamps))
+        n_samples += len(timestamps)
+        if len(timestamps) < len(dest):
+            return n_samples
+
+
+def next_epoch(ring_buffer: RingBuffer, position, epoch_len, hop=None):
+    """Takes the epoch after position, the end of the previous epoch.
+
+    Without hop, it is the latest window, if any sample came after position.
+    With hop, epoch ends hop samples after position. If this epoch is already
+    overwritten, it is the latest epoch on the same hop grid.
+
+    Returns
+    -------
+    epoch : Epoch or None
+        None if there is no new epoch yet.
+    """
+    n_written = ring_buffer.n_written
+    if hop is None:
+        if n_written == position:
+            return None
+        return Epoch(ring_buffer.latest(epoch_len), n_written)
+
+    if n_written - position < hop:
+        return None
+    end = position + hop
+    oldest_start = n_written - ring_buffer.capacity
+    if max(end - epoch_len, 0) < oldest_start:
+        # Consumer is too slow, jump to the latest epoch
+        end = n_written - (n_written - position) % hop
+        if end - epoch_len < oldest_start:
+            end = n_written
+    return Epoch(ring_buffer.get(max(end - epoch_len, 0), end), end)
+
+
+def get_between(ring_buffer: RingBuffer, timestamp_buffer: RingBuffer,
+                t0, t1, strict=False):
+    """Returns samples and their timestamps for timestamps in [t0, t1), or
+    in (t0, t1) if strict."""
+    start = timestamp_buffer.searchsorted(t0, 'right' if strict else 'left')
+    stop = timestamp_buffer.searchsorted(t1, 'left')
+    # Timestamps are written before samples, oldest samples are overwritten
+    # before their timestamps.
+    n_written = ring_buffer.n_written
+    start = max(start, n_written - ring_buffer.capacity)
+    stop = max(min(stop, n_written), start)
+    return ring_buffer.get(start, stop), timestamp_buffer.get(start, stop)
+
+
+async def aiter_epochs(signal, hop=None, max_sleep=0.1):
+    """Asynchronously yields each next `Epoch` of signal.
+
+    Pulls do not block, between them the coroutine sleeps until enough
+    samples for the next epoch are expected, so many signals can be served
+    by one event loop. Time correction of the stream, which waits for the
+    source, is refreshed in the default executor before pulls.
+
+    Parameters
+    ----------
+    signal : WindowedSignal or Subscription
+
+    hop : int, optional
+        Step between epochs in samples, hop of signal by default. Without
+        hop, epoch is the latest window after each new chunk.
+
+    max_sleep : float
+        Maximal sleep between pulls in seconds.
+    """
+    if hop is None:
+        hop = signal.hop
+    loop = asyncio.get_running_loop()
+    while True:
+        if signal.clock.correction_due():
+            await loop.run_in_executor(None, signal.clock.update_correction)
+        epoch = signal.get_next_epoch(hop)
+        if epoch is not None:
+            yield epoch
+            continue
+        n_missing = signal.position + (hop or 1) -\
+            signal.ring_buffer.n_written
+        await asyncio.sleep(min(max(n_missing, 1) / signal.sfreq, max_sleep))
+
 
 class MaskController:
     """Class, encapsulating mask logic
@@ -35,6 +237,12 @@ class MaskController:
 class WindowedSignal:
     """Class to hold window from stream inlet.
 
+    Samples are pulled straight into preallocated ring buffer, window is
+    returned as a read-only view into the buffer when it is contiguous and
+    with one copy otherwise. Views are valid until the next pull. Data keeps
+    channel format of the stream, e.g. float32, callers upcast it when they
+    need more precision.
+
     Parameters
     ----------
     stream_inlet
@@ -42,11 +250,25 @@ class WindowedSignal:
 
     window : float
         Epoch length in seconds.
+
+    hop : int, optional
+        Step between epochs in samples. If set, iteration yields epochs
+        following each other with this step, otherwise the latest window.
+
+    dejitter : bool
+        Smooth timestamps by linear regression, see `StreamClock`.
+
+    Attributes
+    ----------
+    position : int
+        Index of the last epoch, see `Epoch`.
     """
 
-    def __init__(self, stream_inlet: StreamInlet, window: float):
+    def __init__(self, stream_inlet: StreamInlet, window: float,
+                 hop: int=None, dejitter=True):
         self.stream_inlet = stream_inlet
         self.window = window
+        self.hop = hop
         stream_info = stream_inlet.info()
 
         self.sfreq = stream_info.nominal_srate()
@@ -54,14 +276,96 @@ class WindowedSignal:
         self.n_chans = stream_info.channel_count()
         self.epoch_len = int(self.sfreq * window)
         assert self.epoch_len > 0
-        self.deque = collections.deque(maxlen=self.epoch_len)
+        self.ring_buffer = make_ring_buffer(stream_info, self.epoch_len)
+        self.timestamp_buffer = RingBuffer(self.epoch_len)
+        self.reserve_backlog(hop)
+        self.clock = StreamClock(stream_inlet, self.sfreq, dejitter)
+        self.position = 0
 
     def __iter__(self):
+        """Yields epoch data or None, if there is no new epoch since the
+        previous one."""
+        for epoch in self.epochs():
+            yield None if epoch is None else epoch.data
+
+    def epochs(self):
+        """Yields `Epoch` or None, if there is no new epoch since the
+        previous one."""
         while True:
-            yield self.get_epoch()
+            yield self.get_next_epoch()
+
+    def pull(self):
+        """Pulls all available samples into the buffer.
+
+        Returns
+        -------
+        n_samples : int
+            Number of new samples.
+        """
+        return pull_into(self.stream_inlet, self.ring_buffer,
+                         self.timestamp_buffer, self.clock)
+
+    def reserve_backlog(self, hop: int=None):
+        """Grows the buffer to keep epochs with given hop for a consumer,
+        which is late."""
+        if hop is None:
+            return
+        assert hop > 0
+        capacity = self.epoch_len + max(hop, self.epoch_len)
+        if self.ring_buffer.capacity < capacity:
+            self.ring_buffer = self.ring_buffer.resized(capacity)
+            self.timestamp_buffer = self.timestamp_buffer.resized(capacity)
+
+    def aiter(self, hop: int=None):
+        """Asynchronous iterator of epochs, see `aiter_epochs`.
+
+        Examples
+        --------
+        >>> async for epoch in signal.aiter(hop=25):
+        ...     process(epoch.data)
+        """
+        self.reserve_backlog(hop)
+        return aiter_epochs(self, hop)
+
+    def get_next_epoch(self, hop: int=None):
+        """Returns the next `Epoch` or None, see `next_epoch`. hop overrides
+        hop of the signal."""
+        self.pull()
+        if hop is None:
+            hop = self.hop
+        epoch = next_epoch(self.ring_buffer, self.position, self.epoch_len,
+                           hop)
+        if epoch is not None:
+            self.position = epoch.index
+        return epoch
 
     def get_epoch(self):
-        new_data = self.stream_inlet.pull_chunk(max_samples=self.epoch_len)[0]
-        if new_data:
-            self.deque.extend(new_data)
-        return np.array(self.deque)
+        """Returns up to epoch_len latest samples (n_samples, n_chans).
+
+        Result may be a view into the buffer, it is valid until the next
+        call.
+        """
+        self.pull()
+        self.position = self.ring_buffer.n_written
+        return self.ring_buffer.latest(self.epoch_len)
+
+    def get_timestamps(self, start, stop):
+        """Returns timestamps of samples with indices in [start, stop), e.g.
+        of an `Epoch` as (epoch.index - len(epoch.data), epoch.index)."""
+        return self.timestamp_buffer.get(start, stop)
+
+    def get_between(self, t0, t1):
+        """Returns stored samples with timestamps in [t0, t1).
+
+        Samples are found by binary search over timestamps, so the cost does
+        not depend on the buffer length.
+
+        Returns
+        -------
+        data : np.ndarray
+            (n_samples, n_chans)
+
+        timestamps : np.ndarray
+            (n_samples,)
+        """
+        return get_between(self.ring_buffer, self.timestamp_buffer, t0, t1)
@@ -0,0 +1,57 @@
+import numpy as np
+from pylsl import StreamInfo, IRREGULAR_RATE
+
+from .alignment import StreamAligner, segment_epochs
+from .bench_signal_interface import FakeInlet
+
+
+class MarkerInlet:
+    """Inlet returning markers, added with `add`."""
+    def __init__(self):
+        self.stream_info = StreamInfo(channel_count=1,
+                                      nominal_srate=IRREGULAR_RATE,
+                                      source_id='TestMarkers')
+        self.markers = []
+
+    def add(self, label, timestamp):
+        self.markers.append((label, timestamp))
+
+    def info(self):
+        return self.stream_info
+
+    def pull_chunk(self, max_samples, dest_obj=None):
+        markers = self.markers[:max_samples]
+        del self.markers[:len(markers)]
+        for i, (label, _) in enumerate(markers):
+            dest_obj[i] = label
+        return None, [timestamp for _, timestamp in markers]
+
+    def time_correction(self, timeout=None):
+        return 0.0
+
+
+def test_aligner():
+    sfreq = 100
+    # FakeInlet has timestamps n / sfreq
+    signal_inlet = FakeInlet(n_chans=2, sfreq=sfreq, chunk_size=20)
+    marker_inlet = MarkerInlet()
+    aligner = StreamAligner({'bci': signal_inlet, 'experiment': marker_inlet},
+                            markers='experiment', dejitter=False)
+
+    marker_inlet.add(1, 0.1)
+    marker_inlet.add(2, 0.6)
+    assert aligner.update() == []
+    marker_inlet.add(0, 1.1)
+    # Segments are emitted once the signal passes the next marker
+    segments = []
+    for _ in range(6):
+        segments.extend(aligner.update())
+    assert [segment.label for segment in segments] == [1, 2]
+
+    data, timestamps = segments[0].signals['bci']
+    assert np.allclose(timestamps, np.arange(11, 60) / sfreq)
+    assert len(data) == len(timestamps)
+
+    x, y = segment_epochs(segments[1], 'bci', epoch_len=20, epoch_step=10)
+    assert x.shape == (3, 20, 2) and np.all(y == 2)
+    assert np.array_equal(x[1], segments[1].signals['bci'][0][10:30])
@@ -0,0 +1,67 @@
+import numpy as np
+
+from .bench_signal_interface import FakeInlet
+from .broker import SignalBroker
+
+
+def test_shared_pull():
+    inlet = FakeInlet(n_chans=4, sfreq=100, chunk_size=10)
+    broker = SignalBroker(inlet, max_window=1.0, tick=0)
+    short = broker.subscribe(0.05)
+    full = broker.subscribe()
+
+    short.get_epoch()
+    assert broker.ring_buffer.n_written == 10
+    epoch = full.get_epoch()
+    # Every consumer sees the same buffer
+    assert broker.ring_buffer.n_written == 20
+    assert np.array_equal(epoch[-5:], short.get_epoch()[-5:])
+    assert full.epoch_len == 100
+
+
+def test_hop_epochs_large_chunks():
+    # Pull brings more than hop samples, no epoch is skipped
+    class ChunkInlet(FakeInlet):
+        """Inlet with n_chunks chunks ready for pulls."""
+        n_chunks = 0
+
+        def pull_chunk(self, max_samples, dest_obj=None):
+            if self.pending == 0:
+                if self.n_chunks == 0:
+                    return None, []
+                self.n_chunks -= 1
+            return super().pull_chunk(max_samples, dest_obj)
+
+    inlet = ChunkInlet(n_chans=2, sfreq=100, chunk_size=20)
+    broker = SignalBroker(inlet, max_window=1.0, tick=0)
+    subscription = broker.subscribe(1.0, hop=5)
+
+    indices = []
+    for _ in range(20):
+        inlet.n_chunks += 1
+        epoch = subscription.get_next_epoch()
+        while epoch is not None:
+            indices.append(epoch.index)
+            epoch = subscription.get_next_epoch()
+    assert indices == list(range(5, 20 * 20 + 1, 5))
+
+
+def test_hop_epochs():
+    inlet = FakeInlet(n_chans=2, sfreq=100, chunk_size=7)
+    broker = SignalBroker(inlet, max_window=0.5, tick=0)
+    subscription = broker.subscribe(0.1, hop=5)
+
+    indices = []
+    for _ in range(20):
+        epoch = subscription.get_next_epoch()
+        if epoch is not None:
+            indices.append(epoch.index)
+            assert len(epoch.data) == min(10, epoch.index)
+    assert np.all(np.diff(indices) == 5)
+
+    # Slow consumer skips overwritten epochs
+    for _ in range(10):
+        broker.pull()
+    epoch = subscription.get_next_epoch()
+    assert broker.ring_buffer.n_written - epoch.index < 5
+    assert epoch.index % 5 == 0
@@ -0,0 +1,24 @@
+import numpy as np
+import scipy.signal as sig
+
+from .filters import butter_sos, IIRFilter, FIRFilter
+
+
+def test_filters_chunked():
+    x = np.random.normal(size=(2000, 3))
+    chunks = np.split(x, [1, 10, 300, 301, 1500])
+    sos = butter_sos(6, 8 / 125, 12 / 125)
+    assert sos is butter_sos(6, 8 / 125, 12 / 125)
+
+    iir = IIRFilter(sos)
+    y = np.concatenate([iir(chunk) for chunk in chunks])
+    assert np.allclose(y, sig.sosfilt(sos, x, axis=0))
+
+    b = sig.firwin(250, 40, fs=250)
+    expected = sig.lfilter(b, 1, x, axis=0)
+    for method in ['auto', 'direct', 'fft']:
+        fir = FIRFilter(b, method)
+        y = np.concatenate([fir(chunk) for chunk in chunks])
+        assert np.allclose(y, expected)
+    fir.reset()
+    assert np.allclose(fir(x[:, 0]), expected[:, 0])
@@ -0,0 +1,79 @@
+import threading
+
+import numpy as np
+
+from .ring_buffer import RingBuffer
+
+
+def test_ring_buffer_wrap():
+    ring_buffer = RingBuffer(10, shape=(2,))
+    data = np.arange(30).reshape(15, 2)
+
+    ring_buffer.write(data[:7])
+    ring_buffer.write(data[7:])
+
+    assert ring_buffer.n_written == 15
+    assert np.array_equal(ring_buffer.latest(4), data[-4:])
+    assert np.array_equal(ring_buffer.latest(100), data[-10:])
+    # Contiguous range is returned as a view
+    view = ring_buffer.get(5, 10)
+    assert np.shares_memory(view, ring_buffer.data)
+    assert not view.flags.writeable
+
+
+def test_ring_reader():
+    ring_buffer = RingBuffer(10)
+    reader = ring_buffer.reader()
+
+    ring_buffer.write(np.arange(6))
+    assert np.array_equal(reader.read(max_samples=4), np.arange(4))
+    assert np.array_equal(reader.read(), [4, 5])
+    assert len(reader.read()) == 0
+    assert reader.high_water_mark == 6
+
+
+def test_ring_reader_overflow():
+    ring_buffer = RingBuffer(10)
+    reader = ring_buffer.reader()
+
+    ring_buffer.write(np.arange(25))
+    assert np.array_equal(reader.read(), np.arange(15, 25))
+    assert reader.n_lost == 15 and reader.n_overflows == 1
+    assert reader.high_water_mark == 25
+
+
+def test_ring_reader_wait():
+    ring_buffer = RingBuffer(10)
+    reader = ring_buffer.reader()
+    assert not reader.wait(timeout=0.01)
+
+    timer = threading.Timer(0.05, ring_buffer.write, args=(np.ones(3),))
+    timer.start()
+    assert reader.wait(3, timeout=1)
+    assert len(reader.read()) == 3
+
+
+def test_searchsorted():
+    ring_buffer = RingBuffer(10)
+    ring_buffer.write(np.arange(4.0))
+    assert ring_buffer.searchsorted(2.5) == 3
+    ring_buffer.write(np.arange(4.0, 17.0))
+
+    # Stored samples 7..16 wrap around the end of the buffer
+    for value in [0, 7, 8.5, 12, 16, 20]:
+        expected = 7 + np.searchsorted(np.arange(7.0, 17.0), value)
+        assert ring_buffer.searchsorted(value) == expected
+    assert ring_buffer.searchsorted(12, side='right') == 13
+
+
+def test_resized():
+    ring_buffer = RingBuffer(4, shape=(2,))
+    data = np.arange(14).reshape(7, 2)
+    ring_buffer.write(data)
+
+    resized = ring_buffer.resized(8)
+    assert resized.n_written == 7
+    assert np.array_equal(resized.get(3, 7), data[3:])
+    resized.write(data)
+    assert np.array_equal(resized.get(6, 14), np.concatenate((data[-1:],
+                                                               data)))
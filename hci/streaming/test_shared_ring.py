@@ -0,0 +1,102 @@
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+from pylsl import StreamInfo
+
+from .shared_ring import SharedMemoryOutlet, SharedMemoryInlet,\
+    SharedRingBuffer, shared_memory_name
+from .signal_interface import WindowedSignal
+
+
+def make_outlet(source_id, capacity=100):
+    stream_info = StreamInfo(channel_count=3, nominal_srate=100,
+                             channel_format='float32', source_id=source_id)
+    return SharedMemoryOutlet(stream_info, capacity=capacity)
+
+
+def test_shared_memory_transport():
+    outlet = make_outlet('TestSharedRing')
+    try:
+        inlet = SharedMemoryInlet('TestSharedRing', timeout=1)
+        assert inlet.info().channel_count() == 3
+
+        data = np.arange(30, dtype=np.float32).reshape(10, 3)
+        outlet.push_chunk(data[:4], timestamp=1.0)
+        outlet.push_sample(data[4], timestamp=1.01)
+        samples, timestamps = inlet.pull_chunk()
+        assert np.array_equal(samples, data[:5])
+        assert np.allclose(timestamps, [0.97, 0.98, 0.99, 1.0, 1.01])
+
+        outlet.push_chunk(data[5:], timestamp=2.0)
+        dest = np.zeros((8, 3), dtype=np.float32)
+        assert inlet.pull_chunk(dest_obj=dest)[0] is None
+        assert np.array_equal(dest[:5], data[5:])
+
+        # Latest samples are views of shared memory
+        latest, _ = inlet.latest(4)
+        assert np.array_equal(latest, data[-4:])
+        assert np.shares_memory(latest, inlet.ring_buffer.data)
+        inlet.close()
+    finally:
+        outlet.close()
+
+
+def read_epoch(queue):
+    inlet = SharedMemoryInlet('TestSharedRingProcess', timeout=5)
+    signal_interface = WindowedSignal(inlet, 0.1)
+    inlet.reader.position = 0
+    queue.put(signal_interface.get_epoch().copy())
+    inlet.close()
+
+
+def test_shared_memory_process():
+    outlet = make_outlet('TestSharedRingProcess')
+    try:
+        data = np.random.normal(size=(25, 3)).astype(np.float32)
+        outlet.push_chunk(data)
+
+        queue = multiprocessing.get_context('spawn').Queue()
+        process = multiprocessing.get_context('spawn').Process(
+            target=read_epoch, args=(queue,))
+        process.start()
+        epoch = queue.get(timeout=30)
+        process.join()
+        assert np.array_equal(epoch, data[-10:])
+    finally:
+        outlet.close()
+
+
+def test_shared_memory_owner():
+    outlet = make_outlet('TestSharedRingOwner')
+    try:
+        # Live producer is not replaced
+        with pytest.raises(FileExistsError):
+            make_outlet('TestSharedRingOwner')
+
+        # Buffer of a crashed producer is
+        process = multiprocessing.get_context('fork').Process(target=int)
+        process.start()
+        process.join()
+        np.ndarray((6,), dtype=np.int64,
+                   buffer=outlet.ring_buffer.shm.buf)[4] = process.pid
+        outlet.ring_buffer.owner = False
+        replacement = make_outlet('TestSharedRingOwner')
+        replacement.close()
+    finally:
+        outlet.close()
+
+
+def test_shared_memory_not_ready():
+    # Block of a producer, which crashed before it wrote the header
+    name = shared_memory_name('TestSharedRingNotReady')
+    block = shared_memory.SharedMemory(name, create=True, size=4096)
+    try:
+        with pytest.raises(FileNotFoundError):
+            SharedRingBuffer.attach(name)
+        with pytest.raises(ConnectionError):
+            SharedMemoryInlet('TestSharedRingNotReady', timeout=0.1)
+        make_outlet('TestSharedRingNotReady').close()
+    finally:
+        block.close()
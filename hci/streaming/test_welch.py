@@ -0,0 +1,43 @@
+import warnings
+
+import numpy as np
+import scipy.signal as sig
+
+from .welch import IncrementalWelch
+
+
+def test_incremental_welch():
+    fs, window = 250, 1000
+    data = np.random.normal(size=(5000, 3))
+    for hop, kwargs in [(128, {}), (256, {'window': 'flattop',
+                                          'scaling': 'spectrum'}),
+                        (25, {}), (100, {'nperseg': 100, 'noverlap': 0})]:
+        welch = IncrementalWelch(fs, **kwargs)
+        for end in range(window, len(data), hop):
+            x = data[end - window:end]
+            f, pxx = welch.psd(x, end)
+            f_expected, pxx_expected = sig.welch(x.T, fs, **kwargs)
+            assert np.allclose(f, f_expected)
+            assert np.allclose(pxx, pxx_expected, rtol=1e-10, atol=0)
+
+    # Only the new segment is computed, when window moves by a step
+    welch = IncrementalWelch(fs)
+    welch.psd(data[:window], window)
+    n_computed = welch.n_computed
+    welch.psd(data[128:window + 128], window + 128)
+    assert welch.n_computed == n_computed + 1
+
+    f, pxx = welch.psd(data[:window, 0])
+    assert np.allclose(pxx, sig.welch(data[:window, 0], fs)[1])
+
+
+def test_incremental_welch_short_window():
+    # Spectrogram of 1 s window at 250 Hz, nperseg is shrunk as in scipy
+    x = np.random.normal(size=(250, 8))
+    welch = IncrementalWelch(250, window='flattop', scaling='spectrum')
+    f, pxx = welch.psd(x, 250)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        f_expected, pxx_expected = sig.welch(x.T, 250, 'flattop', 256,
+                                             scaling='spectrum')
+    assert np.allclose(f, f_expected) and np.allclose(pxx, pxx_expected)
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from .signal_interface import WindowedSignal
+from .bench_signal_interface import FakeInlet
+
+
+def test_epoch_iterator():
+    inlet = FakeInlet(n_chans=2, sfreq=100, chunk_size=4)
+    signal_interface = WindowedSignal(inlet, 0.1, hop=10)
+    epochs = signal_interface.epochs()
+
+    # About 4 new samples per pull, epoch comes on every third pull at most
+    results = [next(epochs) for _ in range(12)]
+    assert results[:2] == [None, None]
+    indices = [epoch.index for epoch in results if epoch is not None]
+    assert indices == list(range(10, 10 * len(indices) + 1, 10))
+    assert all(len(epoch.data) == 10 for epoch in results
+               if epoch is not None)
+
+    # Without hop, None means no new samples
+    signal_interface = WindowedSignal(inlet, 0.1)
+    assert next(iter(signal_interface)) is not None
+    inlet.chunk = inlet.chunk[:0]
+    assert next(iter(signal_interface)) is None
+
+
+def test_get_between():
+    sfreq = 100
+    inlet = FakeInlet(n_chans=2, sfreq=sfreq, chunk_size=30)
+    signal_interface = WindowedSignal(inlet, 0.5)
+    for _ in range(4):
+        signal_interface.pull()
+
+    # Samples 70..119 are stored, timestamps are index / sfreq
+    data, timestamps = signal_interface.get_between(0.795, 0.895)
+    assert len(data) == len(timestamps) == 10
+    assert np.allclose(timestamps, np.arange(80, 90) / sfreq)
+    assert len(signal_interface.get_between(0.0, 0.5)[0]) == 0
+    assert np.allclose(signal_interface.get_timestamps(115, 120),
+                       np.arange(115, 120) / sfreq)
+
+
+def test_aiter():
+    async def collect(signal_interface, n_epochs):
+        indices = []
+        async for epoch in signal_interface.aiter(hop=5):
+            indices.append(epoch.index)
+            if len(indices) == n_epochs:
+                return indices
+
+    async def main():
+        signals = [WindowedSignal(FakeInlet(n_chans=2, sfreq=1000,
+                                            chunk_size=3), 0.01)
+                   for _ in range(2)]
+        return await asyncio.gather(*[collect(s, 4) for s in signals])
+
+    for indices in asyncio.run(main()):
+        assert np.all(np.diff(indices) == 5)
+
+
+def test_aiter_time_correction():
+    # Time correction waits for the source, it must not block the event loop
+    class SlowInlet(FakeInlet):
+        def time_correction(self, timeout=None):
+            threads.append(threading.current_thread())
+            return 0.0
+
+    async def first_epoch(signal_interface):
+        async for epoch in signal_interface.aiter(hop=5):
+            return epoch
+
+    threads = []
+    signal_interface = WindowedSignal(SlowInlet(n_chans=2, sfreq=1000,
+                                                chunk_size=3), 0.01)
+    asyncio.run(first_epoch(signal_interface))
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,143 @@
+import numpy as np
+import scipy.signal as sig
+
+
+class IncrementalWelch:
+    """Welch PSD of sliding windows, which reuses periodograms of segments.
+
+    Segments are identified by their absolute start index in the stream.
+    Periodogram of each segment is computed once and kept while the segment
+    is inside the window, PSD is their running mean. Result is the same as
+    `scipy.signal.welch` of the window. Segments are reused only when the
+    window moves by a multiple of segment step (nperseg - noverlap),
+    otherwise all of them are computed again. Windows shorter than nperseg
+    are passed to `scipy.signal.welch` with nperseg shrunk to the window,
+    as scipy does itself.
+
+    Parameters
+    ----------
+    fs : float
+        Sampling frequency.
+
+    nperseg : int
+        Length of each segment.
+
+    noverlap : int, optional
+        Overlap of segments, nperseg // 2 by default.
+
+    window : str
+        Window, see `scipy.signal.get_window`.
+
+    scaling : {'density', 'spectrum'}
+        As in `scipy.signal.welch`.
+
+    """
+    def __init__(self, fs, nperseg=256, noverlap=None, window='hann',
+                 scaling='density'):
+        # Arguments for windows shorter than nperseg
+        self.welch_kwargs = {'window': window, 'noverlap': noverlap,
+                             'scaling': scaling}
+        if noverlap is None:
+            noverlap = nperseg // 2
+        assert 0 <= noverlap < nperseg
+        self.fs = fs
+        self.nperseg = nperseg
+        self.noverlap = noverlap
+        self.step = nperseg - noverlap
+        self.window = sig.get_window(window, nperseg)
+        if scaling == 'density':
+            self.scale = 1.0 / (fs * np.sum(self.window ** 2))
+        elif scaling == 'spectrum':
+            self.scale = 1.0 / np.sum(self.window) ** 2
+        else:
+            raise ValueError('Unknown scaling: {}'.format(scaling))
+        self.freqs = np.fft.rfftfreq(nperseg, 1 / fs)
+        self.reset()
+
+    def reset(self):
+        """Forgets all segments."""
+        # Periodograms (n_chans, n_freqs) by segment start
+        self.segments = {}
+        self.total = None
+        self.n_updates = 0
+        # Number of periodograms computed, for benchmarks
+        self.n_computed = 0
+
+    def _periodograms(self, x, offsets):
+        """Periodograms (n_segments, n_chans, n_freqs) of segments of x
+        (n_samples, n_chans), starting at offsets."""
+        segments = x[offsets[:, None] + np.arange(self.nperseg)]
+        segments = segments - segments.mean(axis=1, keepdims=True)
+        spectrum = np.fft.rfft(segments * self.window[:, None], axis=1)
+        pxx = (spectrum.real ** 2 + spectrum.imag ** 2) * self.scale
+        # One-sided spectrum, Nyquist bin is not doubled for even nperseg
+        if self.nperseg % 2:
+            pxx[:, 1:] *= 2
+        else:
+            pxx[:, 1:-1] *= 2
+        return np.swapaxes(pxx, 1, 2)
+
+    def psd(self, x, end=None):
+        """Returns PSD of window x (n_samples, n_chans).
+
+        Parameters
+        ----------
+        x : np.ndarray
+            Window, the same data as before for indices, which are still
+            inside the window.
+
+        end : int, optional
+            Absolute index of the sample after x, e.g. `Epoch.index`.
+            Without it nothing is reused.
+
+        Returns
+        -------
+        f : np.ndarray
+            Frequencies.
+
+        pxx : np.ndarray
+            PSD (n_chans, n_freqs), as `scipy.signal.welch(x.T)`.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if x.ndim == 1:
+            return self.freqs, self.psd(x[:, None], end)[1][0]
+        if end is None:
+            self.reset()
+            end = len(x)
+        if len(x) < self.nperseg:
+            kwargs = dict(self.welch_kwargs)
+            if kwargs['noverlap'] is not None and\
+                    kwargs['noverlap'] >= len(x):
+                kwargs['noverlap'] = None
+            return sig.welch(x.T, self.fs, nperseg=len(x), **kwargs)
+        n_segments = (len(x) - self.noverlap) // self.step
+
+        start = end - len(x)
+        starts = start + self.step * np.arange(n_segments)
+        if self.total is not None and\
+                self.total.shape[0] != x.shape[1]:
+            self.reset()
+
+        for segment_start in list(self.segments):
+            if segment_start < start or\
+                    (segment_start - start) % self.step:
+                pxx = self.segments.pop(segment_start)
+                if self.total is not None:
+                    self.total -= pxx
+        missing = np.array([s for s in starts if s not in self.segments],
+                           dtype=np.int64)
+        if len(missing):
+            periodograms = self._periodograms(x, missing - start)
+            self.n_computed += len(missing)
+            for segment_start, pxx in zip(missing, periodograms):
+                self.segments[int(segment_start)] = pxx
+            if self.total is not None:
+                self.total += periodograms.sum(axis=0)
+
+        self.n_updates += 1
+        if self.total is None or len(missing) == n_segments or\
+                self.n_updates % n_segments == 0:
+            # Running sum is recomputed regularly to keep it exact
+            self.total = np.sum([self.segments[int(s)] for s in starts],
+                                axis=0)
+        return self.freqs, self.total / n_segments